@@ -0,0 +1,159 @@
+import argparse
+import csv
+import itertools
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.genetic_alghoritm.genetic_algorithm import GeneticAlgorithm
+from src.genetic_alghoritm.island_model import IslandModelGeneticAlgorithm
+from src.market.synthetic_market_engine import SyntheticMarketEngine
+from src.usecases.fundamentalist import FundamentalistChromosome, FundamentalScoreTable
+from src.usecases.volatility import TripleRiskEfficiencyChromosome
+
+
+def build_population(engine, chromosome, population_size, wallet_size):
+    wallet_size = min(wallet_size, len(engine.tickers))
+
+    if chromosome == "fundamentalist":
+        table = FundamentalScoreTable(
+            engine.get_multiple_fundamentalist_data(engine.tickers)
+        )
+        return [
+            FundamentalistChromosome(
+                tickers=random.sample(engine.tickers, wallet_size),
+                fundamental_scores=table,
+            )
+            for _ in range(population_size)
+        ]
+
+    # Stage two of main.py: every wallet shares the tickers of one best wallet.
+    tickers = random.sample(engine.tickers, wallet_size)
+    return [
+        TripleRiskEfficiencyChromosome(
+            engine.get_random_distribuited_wallet(tickers, total_number_of_stocks=100),
+            engine,
+            engine.risk_free_rate,
+        )
+        for _ in range(population_size)
+    ]
+
+
+def build_algorithm(case: dict, args):
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+
+    engine = SyntheticMarketEngine(
+        case["universe"], days=case["days"], risk_free_rate=0.05, seed=args.seed
+    )
+    population = build_population(
+        engine, args.chromosome, case["population"], args.wallet_size
+    )
+
+    if case["islands"] > 1:
+        return IslandModelGeneticAlgorithm(
+            initial_population=population,
+            threshold=args.threshold,
+            islands_numbers=case["islands"],
+            max_generations=args.generations,
+            mutation_chance=args.mutation_chance,
+            executor_type=IslandModelGeneticAlgorithm.ExecutorType[args.executor],
+            observers=[],
+        )
+
+    return GeneticAlgorithm(
+        initial_population=population,
+        threshold=args.threshold,
+        max_generations=args.generations,
+        mutation_chance=args.mutation_chance,
+        observers=[],
+    )
+
+
+def peak_memory(case: dict, args) -> int:
+    # A separate, untimed run from the same seed: tracing every allocation
+    # slows the GA several times over, so it never overlaps the timed run.
+    algorithm = build_algorithm(case, args)
+
+    tracemalloc.start()
+    try:
+        algorithm.run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(case: dict, args) -> dict:
+    algorithm = build_algorithm(case, args)
+
+    start = time.perf_counter()
+    algorithm.run()
+    elapsed = time.perf_counter() - start
+
+    peak = peak_memory(case, args) if args.memory else None
+
+    if case["islands"] > 1:
+        stats = algorithm.island_stats
+    else:
+        stats = [algorithm.stats()]
+
+    generations = sum(island["generation"] for island in stats)
+    evaluations = sum(island["evaluations"] for island in stats)
+    reached = any(island["stop_reason"] == "threshold" for island in stats)
+
+    return dict(
+        case,
+        path="island" if case["islands"] > 1 else "single",
+        seconds=round(elapsed, 4),
+        generations_per_sec=round(generations / elapsed, 2),
+        evaluations_per_sec=round(evaluations / elapsed, 2),
+        peak_memory_mb=round(peak / 2**20, 2) if peak else None,
+        time_to_threshold=round(elapsed, 4) if reached else None,
+        best_fitness=round(max(island["best_fitness"] for island in stats), 6),
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Throughput benchmark of the GA over a synthetic market."
+    )
+    parser.add_argument("--population", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--universe", type=int, nargs="+", default=[16, 128])
+    parser.add_argument("--days", type=int, nargs="+", default=[252, 2520])
+    parser.add_argument("--islands", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--mutation-chance", type=float, default=0.1)
+    parser.add_argument("--wallet-size", type=int, default=7)
+    parser.add_argument(
+        "--chromosome", choices=["triple", "fundamentalist"], default="triple"
+    )
+    parser.add_argument("--executor", choices=["THREAD", "PROCESS"], default="THREAD")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for population, universe, days, islands in itertools.product(
+        args.population, args.universe, args.days, args.islands
+    ):
+        case = dict(population=population, universe=universe, days=days, islands=islands)
+        results.append(run_case(case, args))
+        print(json.dumps(results[-1]), file=sys.stderr)
+
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(results[0].keys()))
+    writer.writeheader()
+    writer.writerows(results)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
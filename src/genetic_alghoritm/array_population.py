@@ -0,0 +1,166 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from time import perf_counter
+from typing import List, Optional
+
+import numpy as np
+
+from . import selection
+from .genetic_algorithm import GeneticAlgorithm
+from .observers import ConsoleObserver, GenerationEvent, GenerationObserver
+
+
+def random_true_column(mask: np.ndarray) -> np.ndarray:
+    # Uniformly picks one True column per row (rows must have at least one).
+    keys = np.random.random(mask.shape)
+    keys[~mask] = -1.0
+    return keys.argmax(axis=1)
+
+
+class ArrayPopulation(ABC):
+    # Whole population stored as one individuals x ticker-universe matrix.
+    # Subclasses mirror a Chromosome's operators with vectorized semantics.
+
+    def __init__(self, genomes: np.ndarray) -> None:
+        self.genomes = genomes
+
+    def __len__(self) -> int:
+        return len(self.genomes)
+
+    @abstractmethod
+    def fitness(self) -> np.ndarray: ...
+
+    @abstractmethod
+    def crossover(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        # Returns a (pairs, 2, universe) array with two sons per pair.
+        ...
+
+    @abstractmethod
+    def mutate(self, rows: np.ndarray) -> None: ...
+
+
+class ArrayGeneticAlgorithm:
+
+    def __init__(
+        self,
+        population: ArrayPopulation,
+        threshold: Optional[float],
+        max_generations: int = 100,
+        mutation_chance: float = 0.01,
+        crossover_chance: float = 0.7,
+        selection_type=GeneticAlgorithm.SelectionType.TOURNAMENT,
+        tournament_size: Optional[int] = None,
+        observers: Optional[List[GenerationObserver]] = None,
+    ) -> None:
+        self._population = population
+        self._threshold = threshold
+        self._max_generations = max_generations
+        self._mutation_chance = mutation_chance
+        self._crossover_chance = crossover_chance
+        self._selection_type = selection_type
+        self._tournament_size = tournament_size
+        self.elite: List[np.ndarray] = []
+        self._observers = observers if observers is not None else [ConsoleObserver()]
+        self._timings = dict(selection=0.0, crossover=0.0, mutation=0.0, evaluation=0.0)
+
+    def _select_parents(self, fitnesses: np.ndarray, pairs: int) -> np.ndarray:
+        if self._selection_type == GeneticAlgorithm.SelectionType.ROULETTE:
+            return selection.roulette(fitnesses, pairs)
+
+        if self._selection_type == GeneticAlgorithm.SelectionType.SUS:
+            return selection.stochastic_universal_sampling(fitnesses, pairs)
+
+        size = self._tournament_size or max(2, len(fitnesses) // 2)
+        return selection.tournament(fitnesses, pairs, size)
+
+    def _reproduce_and_replace(self, fitnesses: np.ndarray) -> None:
+        genomes = self._population.genomes
+        size = len(genomes)
+        pairs = (size + 1) // 2
+
+        started = perf_counter()
+        parents = self._select_parents(fitnesses, pairs)
+        self._timings["selection"] = perf_counter() - started
+
+        started = perf_counter()
+        first, second = genomes[parents[:, 0]], genomes[parents[:, 1]]
+
+        crossing = (np.random.random(pairs) < self._crossover_chance) & (
+            first != second
+        ).any(axis=1)
+
+        children = np.stack([first, second], axis=1)
+        if crossing.any():
+            children[crossing] = self._population.crossover(
+                first[crossing], second[crossing]
+            )
+
+        self._population.genomes = children.reshape(2 * pairs, -1)[:size]
+        self._timings["crossover"] = perf_counter() - started
+
+    def _mutate(self) -> None:
+        rows = np.flatnonzero(
+            np.random.random(len(self._population)) < self._mutation_chance
+        )
+        if len(rows):
+            self._population.mutate(rows)
+
+    def _notify(
+        self, generation: int, fitnesses: np.ndarray, best_fitness: float, started_at: float
+    ) -> None:
+        # Distinct rows counted through a void view of each row, much cheaper
+        # than np.unique(axis=0) on large populations.
+        genomes = np.ascontiguousarray(self._population.genomes)
+        rows = genomes.view(np.dtype((np.void, genomes.dtype.itemsize * genomes.shape[1])))
+        size = len(genomes)
+        event = GenerationEvent(
+            island=None,
+            generation=generation,
+            best_fitness=float(best_fitness),
+            generation_best_fitness=float(fitnesses.max()),
+            mean_fitness=float(fitnesses.mean()),
+            std_fitness=float(fitnesses.std()),
+            diversity=len(np.unique(rows)) / size,
+            selection_seconds=self._timings["selection"],
+            crossover_seconds=self._timings["crossover"],
+            mutation_seconds=self._timings["mutation"],
+            evaluation_seconds=self._timings["evaluation"],
+            elapsed_seconds=perf_counter() - started_at,
+            evaluations=(generation + 1) * size,
+            cache_hits=0,
+            cache_misses=0,
+        )
+
+        for observer in self._observers:
+            observer.on_generation(event)
+
+    def run(self) -> tuple[np.ndarray, float]:
+        started_at = perf_counter()
+        fitnesses = self._population.fitness()
+        best_index = int(fitnesses.argmax())
+        best, best_fitness = self._population.genomes[best_index].copy(), fitnesses[best_index]
+
+        for generation in range(self._max_generations):
+            self._reproduce_and_replace(fitnesses)
+
+            started = perf_counter()
+            self._mutate()
+            self._timings["mutation"] = perf_counter() - started
+
+            started = perf_counter()
+            fitnesses = self._population.fitness()
+            self._timings["evaluation"] = perf_counter() - started
+
+            highest = int(fitnesses.argmax())
+            if fitnesses[highest] > best_fitness:
+                best = self._population.genomes[highest].copy()
+                best_fitness = fitnesses[highest]
+            self.elite.append(best)
+
+            if self._observers:
+                self._notify(generation + 1, fitnesses, best_fitness, started_at)
+
+            if self._threshold is not None and best_fitness >= self._threshold:
+                break
+
+        return best, float(best_fitness)
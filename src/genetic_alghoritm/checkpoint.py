@@ -0,0 +1,111 @@
+from __future__ import annotations
+import os
+import pickle
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+
+def save_checkpoint(path, payload: Any) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_bytes(
+        zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+    )
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path) -> Any:
+    return pickle.loads(zlib.decompress(Path(path).read_bytes()))
+
+
+class IslandCheckpoints:
+    # One file per island and checkpointed generation, written right after a
+    # migration epoch, so every island that has not finished holds a file for
+    # the same generations. Resuming rolls all of them back to the latest
+    # generation the slowest running island reached, which is a consistent
+    # cut: no migration message of a later epoch had been consumed there.
+    # Finished islands keep their ".final" file and older files that running
+    # islands may still be rolled back to.
+    RUN = "run.ckpt"
+    _PATTERN = re.compile(r"island-(\d+)-(\d+)(\.final)?\.ckpt$")
+
+    def __init__(self, directory, islands: int, interval: int) -> None:
+        self.directory = Path(directory)
+        self.islands = islands
+        self.interval = interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, island: int, generation: int, final: bool) -> Path:
+        suffix = ".final" if final else ""
+        return self.directory / f"island-{island:03d}-{generation:08d}{suffix}.ckpt"
+
+    def _files(self) -> dict[int, list[tuple[int, bool, Path]]]:
+        files: dict[int, list[tuple[int, bool, Path]]] = {}
+        for path in self.directory.iterdir():
+            match = self._PATTERN.match(path.name)
+            if match:
+                island, generation = int(match[1]), int(match[2])
+                files.setdefault(island, []).append(
+                    (generation, match[3] is not None, path)
+                )
+
+        for entries in files.values():
+            entries.sort()
+        return files
+
+    def _running_minimum(self, files) -> Optional[float]:
+        if len(files) < self.islands:
+            return None
+
+        running = [entries[-1][0] for entries in files.values() if not entries[-1][1]]
+        return min(running) if running else float("inf")
+
+    def due(self, previous_generation: int, generation: int) -> bool:
+        return generation // self.interval > previous_generation // self.interval
+
+    def save(self, island: int, state: dict, final: bool = False) -> None:
+        save_checkpoint(self._path(island, state["generation"], final), state)
+
+        files = self._files()
+        minimum = self._running_minimum(files)
+        if minimum is None:
+            return
+
+        own = files[island]
+        for generation, _, path in own[:-1]:
+            if generation < minimum:
+                path.unlink(missing_ok=True)
+
+    def clear_intermediate(self) -> None:
+        files = self._files()
+        if self._running_minimum(files) != float("inf"):
+            return
+
+        for entries in files.values():
+            for _, final, path in entries:
+                if not final:
+                    path.unlink(missing_ok=True)
+
+    def save_run(self, settings: dict) -> None:
+        save_checkpoint(self.directory / self.RUN, settings)
+
+    @classmethod
+    def load_run(cls, directory) -> dict:
+        return load_checkpoint(Path(directory) / cls.RUN)
+
+    def resume_states(self) -> list[dict]:
+        files = self._files()
+        minimum = self._running_minimum(files)
+        if minimum is None:
+            raise ValueError(f"Checkpoint incompleto em {self.directory}")
+
+        states = []
+        for island in range(self.islands):
+            eligible = [path for generation, _, path in files[island] if generation <= minimum]
+            states.append(load_checkpoint(eligible[-1]))
+
+        return states
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import TypeVar, Tuple, Type
+from typing import Any, Hashable, TypeVar, Tuple, Type, List
 from abc import ABC, abstractmethod
 
 T = TypeVar("T", bound="Chromosome")
@@ -18,3 +18,53 @@ class Chromosome(ABC):
 
     @abstractmethod
     def genetic_information(self) -> str: ...
+
+    @classmethod
+    def batch_fitness(cls: Type[T], population: List[T]) -> List[float]:
+        return [individual.fitness() for individual in population]
+
+    # Objectives for multi-objective search (NSGA2), all to be maximized.
+
+    def objectives(self) -> Tuple[float, ...]:
+        return (self.fitness(),)
+
+    @classmethod
+    def batch_objectives(cls: Type[T], population: List[T]) -> List[Tuple[float, ...]]:
+        return [individual.objectives() for individual in population]
+
+    # Compact, picklable form used to move individuals between processes
+    # and to copy them (hall of fame, best individual, deduplication). The
+    # context is whatever the chromosome needs besides its genome (market
+    # engine, fundamentals map) and is shipped to workers once.
+
+    @abstractmethod
+    def to_genome(self) -> Hashable: ...
+
+    @abstractmethod
+    def genome_context(self) -> Any: ...
+
+    @classmethod
+    @abstractmethod
+    def from_genome(cls: Type[T], genome: Hashable, context: Any) -> T: ...
+
+    def copy(self: T) -> T:
+        return type(self).from_genome(self.to_genome(), self.genome_context())
+
+    # What the fitness depends on besides the genome. FitnessCache keys on
+    # it, so one cache can serve several engines (or data windows) without
+    # returning another context's value.
+
+    def fitness_scope(self) -> Hashable:
+        return self.genome_context()
+
+    @classmethod
+    def share_context(cls, context: Any) -> Any:
+        return context
+
+    @classmethod
+    def attach_context(cls, shared_context: Any) -> Any:
+        return shared_context
+
+    @classmethod
+    def release_context(cls, shared_context: Any) -> None:
+        pass
@@ -0,0 +1,98 @@
+from __future__ import annotations
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .chromosome import Chromosome
+
+
+class FitnessCache:
+    # Keys are recomputed on every lookup from the genome itself (to_genome(),
+    # not a hash of it, so distinct wallets never share an entry) and from
+    # fitness_scope() (the engine and its revision), so an in-place mutate()
+    # simply maps to a new key and one cache can be shared across engines;
+    # entries for the previous genome stay valid for that genome and scope.
+    # ``evaluator`` names the batch classmethod that computes missing values
+    # (batch_objectives caches the objective tuples used by NSGA2).
+
+    def __init__(self, maxsize: int = 100_000, evaluator: str = "batch_fitness") -> None:
+        self._maxsize = maxsize
+        self._evaluator = evaluator
+        self._entries: OrderedDict[Hashable, float] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(chromosome: Chromosome) -> Tuple[type, Hashable, Hashable]:
+        return type(chromosome), chromosome.fitness_scope(), chromosome.to_genome()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def evaluate(self, population: List[Chromosome]) -> List[float]:
+        return self.evaluate_counting(population)[0]
+
+    def evaluate_counting(
+        self, population: List[Chromosome]
+    ) -> Tuple[List[float], int]:
+        fitnesses: List[Optional[float]] = [None] * len(population)
+        missing: Dict[Hashable, List[int]] = {}
+
+        with self._lock:
+            for position, individual in enumerate(population):
+                key = self._key(individual)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    fitnesses[position] = self._entries[key]
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(position)
+
+            self.misses += len(missing)
+            self.hits += sum(len(positions) - 1 for positions in missing.values())
+
+        if not missing:
+            return fitnesses, 0
+
+        # Batch evaluators read the engine of the first individual, so misses
+        # are evaluated in one batch per chromosome type and scope.
+        batches: Dict[Tuple[type, Hashable], List[Hashable]] = {}
+        for key in missing:
+            batches.setdefault(key[:2], []).append(key)
+
+        values: Dict[Hashable, float] = {}
+        for keys in batches.values():
+            individuals = [population[missing[key][0]] for key in keys]
+            evaluated = getattr(type(individuals[0]), self._evaluator)(individuals)
+            values.update(zip(keys, evaluated))
+
+        with self._lock:
+            for key, positions in missing.items():
+                value = values[key]
+                for position in positions:
+                    fitnesses[position] = value
+
+                if self._maxsize > 0:
+                    self._entries[key] = value
+                    self._entries.move_to_end(key)
+
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+        return fitnesses, len(missing)
+
+    def invalidate(self, chromosome: Chromosome) -> None:
+        with self._lock:
+            self._entries.pop(self._key(chromosome), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
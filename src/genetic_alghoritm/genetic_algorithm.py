@@ -1,16 +1,28 @@
 from __future__ import annotations
-from typing import TypeVar, Generic, List, Tuple, Callable
+from typing import Any, TypeVar, Generic, List, Tuple, Callable, Optional
+from dataclasses import replace
 from enum import Enum
-from random import choices, random
-from heapq import nlargest
-from statistics import mean
+from random import getstate, random, sample, setstate
+from heapq import nlargest, nsmallest
+from time import perf_counter
+import numpy as np
+from . import selection
 from .chromosome import Chromosome
+from .checkpoint import load_checkpoint, save_checkpoint
+from .fitness_cache import FitnessCache
+from .hall_of_fame import HallOfFame
+from .observers import ConsoleObserver, GenerationEvent, GenerationObserver
+from .termination import StopReason, TerminationCriteria
 
 C = TypeVar("C", bound=Chromosome)
 
 
 class GeneticAlgorithm(Generic[C]):
-    SelectionType = Enum("SelectionType", "ROULETTE TOURNAMENT")
+    SelectionType = Enum(
+        "SelectionType",
+        "ROULETTE TOURNAMENT SUS",
+        qualname="GeneticAlgorithm.SelectionType",
+    )
 
     def __init__(
         self,
@@ -20,6 +32,15 @@ class GeneticAlgorithm(Generic[C]):
         mutation_chance: float = 0.01,
         crossover_chance: float = 0.7,
         selection_type: SelectionType = SelectionType.TOURNAMENT,
+        fitness_cache: Optional[FitnessCache] = None,
+        termination: Optional[TerminationCriteria] = None,
+        tournament_size: Optional[int] = None,
+        observers: Optional[List[GenerationObserver]] = None,
+        island: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: int = 10,
+        hall_of_fame_size: int = 10,
+        deduplicate: bool = False,
     ) -> None:
         self._population = initial_population
         self._threshold = threshold
@@ -27,30 +48,63 @@ class GeneticAlgorithm(Generic[C]):
         self._mutation_chance = mutation_chance
         self._crossover_chance = crossover_chance
         self._selection_type = selection_type
+        self._tournament_size = tournament_size
         self._fitness_key: Callable = type(self._population[0]).fitness
+        self._fitnesses: List[float] = []
+        self._generation = 0
+        self._best: Optional[C] = None
+        self._best_fitness = float("-inf")
+        self._elite: HallOfFame[C] = HallOfFame(hall_of_fame_size)
+        self._deduplicate = deduplicate
+        self._clones_replaced = 0
+        self._fitness_cache = (
+            fitness_cache if fitness_cache is not None else FitnessCache()
+        )
+        self._termination = termination or TerminationCriteria()
+        self._stop_reason: Optional[StopReason] = None
+        self._started_at: Optional[float] = None
+        self._last_improvement = 0
+        self._evaluations = 0
+        self._observers = observers if observers is not None else [ConsoleObserver()]
+        self._island = island
+        self._timings = dict(selection=0.0, crossover=0.0, mutation=0.0, evaluation=0.0)
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
 
-    def _pick_roulette(self, wheel: List[float]) -> Tuple[C, C]:
-        return tuple(choices(self._population, weights=wheel, k=2))
+    def _evaluate(self) -> None:
+        self._fitnesses, evaluated = self._fitness_cache.evaluate_counting(
+            self._population
+        )
+        self._evaluations += evaluated
 
-    def _pick_tournament(self, num_participants: int) -> Tuple[C, C]:
-        participants: List[C] = choices(self._population, k=num_participants)
-        return tuple(nlargest(2, participants, key=self._fitness_key))
+    def _select_parents(self, pairs: int) -> np.ndarray:
+        fitnesses = np.asarray(self._fitnesses, dtype=np.float64)
+
+        if self._selection_type == GeneticAlgorithm.SelectionType.ROULETTE:
+            return selection.roulette(fitnesses, pairs)
+
+        if self._selection_type == GeneticAlgorithm.SelectionType.SUS:
+            return selection.stochastic_universal_sampling(fitnesses, pairs)
+
+        size = self._tournament_size or max(2, len(self._population) // 2)
+        return selection.tournament(fitnesses, pairs, size)
 
     def _reproduce_and_replace(self) -> None:
         new_population: List[C] = []
 
-        while len(new_population) < len(self._population):
+        pairs = (len(self._population) + 1) // 2
+        started = perf_counter()
+        parent_indexes = self._select_parents(pairs)
+        self._timings["selection"] = perf_counter() - started
 
-            if self._selection_type == GeneticAlgorithm.SelectionType.ROULETTE:
-                parents: Tuple[C, C] = self._pick_roulette(
-                    [x.fitness() for x in self._population]
-                )
+        started = perf_counter()
+        crossovers = np.random.random(pairs) < self._crossover_chance
 
-            else:
-                parents = self._pick_tournament(len(self._population) // 2)
+        for (first, second), crossover in zip(parent_indexes, crossovers):
+            parents = (self._population[first], self._population[second])
 
             if (
-                random() < self._crossover_chance
+                crossover
                 and parents[0].genetic_information() != parents[1].genetic_information()
             ):
                 new_population.extend(parents[0].crossover(parents[1]))
@@ -62,27 +116,331 @@ class GeneticAlgorithm(Generic[C]):
             new_population.pop()
 
         self._population = new_population
+        self._timings["crossover"] = perf_counter() - started
 
     def _mutate(self) -> None:
         for individual in self._population:
             if random() < self._mutation_chance:
                 individual.mutate()
 
-    def run(self) -> set[C]:
-        elite = set()
-        best: C = max(self._population, key=self._fitness_key)
-        for generation in range(self._max_generations):
+    def _replace_clones(self, attempts: int = 3) -> None:
+        # Every repeated genome after its first occurrence is replaced by a
+        # mutated copy, retried a few times until the genome is new, so the
+        # evaluation does not spend a slot on a genome already present.
+        seen = set()
+        for position, individual in enumerate(self._population):
+            genome = individual.genetic_information()
+            if genome in seen:
+                replacement = individual.copy()
+                for _ in range(attempts):
+                    replacement.mutate()
+                    if replacement.genetic_information() not in seen:
+                        break
+
+                self._population[position] = replacement
+                self._clones_replaced += 1
+                genome = replacement.genetic_information()
+            seen.add(genome)
+
+    def _fittest_index(self) -> int:
+        return max(range(len(self._population)), key=self._fitnesses.__getitem__)
+
+    def _fittest(self) -> Tuple[C, float]:
+        index = self._fittest_index()
+        return self._population[index], self._fitnesses[index]
+
+    def _update_best(self) -> None:
+        highest, highest_fitness = self._fittest()
+
+        # A copy: individuals are mutated in place, and a reference would
+        # drift away from the fitness recorded for it.
+        if highest_fitness > self._best_fitness:
+            self._best, self._best_fitness = highest.copy(), highest_fitness
+            self._last_improvement = self._generation
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def finished(self) -> bool:
+        return self._stop_reason is not None or self._generation >= self._max_generations
+
+    @property
+    def stop_reason(self) -> Optional[StopReason]:
+        if self._stop_reason is None and self._generation >= self._max_generations:
+            return StopReason.MAX_GENERATIONS
+        return self._stop_reason
+
+    @property
+    def evaluations(self) -> int:
+        return self._evaluations
+
+    @property
+    def best(self) -> Tuple[Optional[C], float]:
+        return self._best, self._best_fitness
 
-            print(
-                f"Generation {generation} Best {best.fitness()} Avg {mean(map(self._fitness_key, self._population))}"
+    def stats(self) -> dict:
+        return dict(
+            generation=self._generation,
+            evaluations=self._evaluations,
+            clones_replaced=self._clones_replaced,
+            best_fitness=self._best_fitness,
+            stop_reason=self.stop_reason.value if self.stop_reason else None,
+        )
+
+    def diversity(self) -> float:
+        genomes = {individual.genetic_information() for individual in self._population}
+        return len(genomes) / len(self._population)
+
+    def _check_termination(self) -> None:
+        criteria = self._termination
+
+        if self._threshold is not None and self._best_fitness >= self._threshold:
+            self._stop_reason = StopReason.THRESHOLD
+            if criteria.stop_event is not None and criteria.stop_all_on_threshold:
+                criteria.stop_event.set()
+
+        elif (
+            criteria.patience is not None
+            and self._generation - self._last_improvement >= criteria.patience
+        ):
+            self._stop_reason = StopReason.PLATEAU
+
+        elif (
+            criteria.min_diversity is not None
+            and self.diversity() < criteria.min_diversity
+        ):
+            self._stop_reason = StopReason.DIVERSITY
+
+        elif (
+            criteria.max_seconds is not None
+            and perf_counter() - self._started_at >= criteria.max_seconds
+        ):
+            self._stop_reason = StopReason.TIME_BUDGET
+
+        elif (
+            criteria.max_evaluations is not None
+            and self._evaluations >= criteria.max_evaluations
+        ):
+            self._stop_reason = StopReason.EVALUATION_BUDGET
+
+        elif criteria.stop_event is not None and criteria.stop_event.is_set():
+            self._stop_reason = StopReason.EXTERNAL
+
+    def emigrants(self, count: int, best: bool = True) -> List[C]:
+        self._ensure_evaluated()
+        count = min(count, len(self._population))
+        if best:
+            indexes = nlargest(
+                count, range(len(self._population)), key=self._fitnesses.__getitem__
             )
+        else:
+            indexes = sample(range(len(self._population)), count)
+
+        return [self._population[i] for i in indexes]
+
+    def immigrate(self, individuals: List[C], replace_worst: bool = True) -> None:
+        self._ensure_evaluated()
+        individuals = individuals[: len(self._population) - 1]
+        if not individuals:
+            return
+
+        if replace_worst:
+            targets = nsmallest(
+                len(individuals),
+                range(len(self._population)),
+                key=self._fitnesses.__getitem__,
+            )
+        else:
+            fittest = self._fittest_index()
+            candidates = [i for i in range(len(self._population)) if i != fittest]
+            targets = sample(candidates, len(individuals))
+
+        fitnesses, evaluated = self._fitness_cache.evaluate_counting(individuals)
+        self._evaluations += evaluated
+        for target, individual, fitness in zip(targets, individuals, fitnesses):
+            self._population[target] = individual
+            self._fitnesses[target] = fitness
+
+        self._update_best()
+
+    def _ensure_evaluated(self) -> None:
+        if not self._fitnesses:
+            if self._deduplicate:
+                self._replace_clones()
+            self._evaluate()
+            self._update_best()
+            self._elite.update_all(self._population, self._fitnesses)
+
+    def rescore(self) -> None:
+        # The data behind the fitness changed (a streaming engine received a
+        # new bar): every cached value is stale, so the population and the
+        # elite are evaluated again and the best is chosen among them anew.
+        # A stop caused by the old scores is lifted.
+        self._fitness_cache.clear()
+        self._evaluate()
+
+        def evaluate(members: List[C]) -> List[float]:
+            fitnesses, evaluated = self._fitness_cache.evaluate_counting(members)
+            self._evaluations += evaluated
+            return fitnesses
+
+        self._elite.rescore(evaluate)
+        self._elite.update_all(self._population, self._fitnesses)
+        self._best, self._best_fitness = self._elite.best
+        self._last_improvement = self._generation
+        self._stop_reason = None
+
+    def _notify(self) -> None:
+        fitnesses = np.asarray(self._fitnesses, dtype=np.float64)
+        event = GenerationEvent(
+            island=self._island,
+            generation=self._generation,
+            best_fitness=float(self._best_fitness),
+            generation_best_fitness=float(fitnesses.max()),
+            mean_fitness=float(fitnesses.mean()),
+            std_fitness=float(fitnesses.std()),
+            diversity=self.diversity(),
+            selection_seconds=self._timings["selection"],
+            crossover_seconds=self._timings["crossover"],
+            mutation_seconds=self._timings["mutation"],
+            evaluation_seconds=self._timings["evaluation"],
+            elapsed_seconds=perf_counter() - self._started_at,
+            evaluations=self._evaluations,
+            cache_hits=self._fitness_cache.hits,
+            cache_misses=self._fitness_cache.misses,
+        )
+
+        for observer in self._observers:
+            observer.on_generation(event)
+
+    def state(self) -> dict:
+        # Individuals are stored once and referenced by index, preserving the
+        # aliasing inside the population (parents copied without crossover
+        # are the same object and mutate together), so a restored run is
+        # identical to an uninterrupted one. The best individual and the hall
+        # of fame are copies and are stored as genomes.
+        self._ensure_evaluated()
+        individuals, indexes = [], {}
+
+        def index_of(individual: C) -> int:
+            if id(individual) not in indexes:
+                indexes[id(individual)] = len(individuals)
+                individuals.append(individual)
+            return indexes[id(individual)]
+
+        population = [index_of(individual) for individual in self._population]
+
+        return dict(
+            chromosome_type=type(self._population[0]),
+            genomes=[individual.to_genome() for individual in individuals],
+            population=population,
+            hall_of_fame=[
+                (individual.to_genome(), fitness) for individual, fitness in self._elite.items()
+            ],
+            best=self._best.to_genome(),
+            fitnesses=list(self._fitnesses),
+            best_fitness=self._best_fitness,
+            generation=self._generation,
+            last_improvement=self._last_improvement,
+            evaluations=self._evaluations,
+            clones_replaced=self._clones_replaced,
+            stop_reason=self._stop_reason,
+            elapsed_seconds=(
+                perf_counter() - self._started_at if self._started_at is not None else 0.0
+            ),
+            rng_state=(getstate(), np.random.get_state()),
+            settings=dict(
+                threshold=self._threshold,
+                max_generations=self._max_generations,
+                mutation_chance=self._mutation_chance,
+                crossover_chance=self._crossover_chance,
+                selection_type=self._selection_type,
+                termination=replace(self._termination, stop_event=None),
+                tournament_size=self._tournament_size,
+                island=self._island,
+                hall_of_fame_size=self._elite.maxsize,
+                deduplicate=self._deduplicate,
+            ),
+        )
+
+    @classmethod
+    def restore(cls, state: dict, context: Any, **overrides) -> GeneticAlgorithm:
+        chromosome_type = state["chromosome_type"]
+        individuals = [chromosome_type.from_genome(g, context) for g in state["genomes"]]
+
+        algorithm = cls(
+            initial_population=[individuals[i] for i in state["population"]],
+            **{**state["settings"], **overrides},
+        )
+        algorithm._fitnesses = list(state["fitnesses"])
+        for genome, fitness in state["hall_of_fame"]:
+            algorithm._elite.update(chromosome_type.from_genome(genome, context), fitness)
+        algorithm._clones_replaced = state["clones_replaced"]
+        algorithm._best = chromosome_type.from_genome(state["best"], context)
+        algorithm._best_fitness = state["best_fitness"]
+        algorithm._generation = state["generation"]
+        algorithm._last_improvement = state["last_improvement"]
+        algorithm._evaluations = state["evaluations"]
+        algorithm._stop_reason = state["stop_reason"]
+        algorithm._started_at = perf_counter() - state["elapsed_seconds"]
+
+        python_state, numpy_state = state["rng_state"]
+        setstate(python_state)
+        np.random.set_state(numpy_state)
+
+        return algorithm
+
+    def checkpoint(self, path: str) -> None:
+        save_checkpoint(path, self.state())
+
+    @classmethod
+    def resume(cls, path: str, context: Any, **overrides) -> GeneticAlgorithm:
+        return cls.restore(load_checkpoint(path), context, **overrides)
+
+    def evolve(self, generations: int) -> None:
+        if self._started_at is None:
+            self._started_at = perf_counter()
+
+        self._ensure_evaluated()
+        self._check_termination()
+        for _ in range(generations):
+            if self.finished:
+                break
 
             self._reproduce_and_replace()
+
+            started = perf_counter()
             self._mutate()
-            highest: C = max(self._population, key=self._fitness_key)
+            if self._deduplicate:
+                self._replace_clones()
+            self._timings["mutation"] = perf_counter() - started
+
+            started = perf_counter()
+            self._evaluate()
+            self._timings["evaluation"] = perf_counter() - started
+
+            self._update_best()
+            self._elite.update_all(self._population, self._fitnesses)
+
+            self._generation += 1
+            if self._observers:
+                self._notify()
+            self._check_termination()
+
+            if (
+                self._checkpoint_path is not None
+                and self._generation % self._checkpoint_interval == 0
+            ):
+                self.checkpoint(self._checkpoint_path)
+
+    @property
+    def hall_of_fame(self) -> HallOfFame[C]:
+        return self._elite
 
-            if highest.fitness() > best.fitness():
-                best = highest
-            elite.add(best)
+    def run(self) -> List[C]:
+        # The hall of fame: the fittest distinct genomes seen, best first.
+        self.evolve(self._max_generations - self._generation)
 
-        return elite
+        return self._elite.members()
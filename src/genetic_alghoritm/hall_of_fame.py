@@ -0,0 +1,88 @@
+from __future__ import annotations
+from heapq import heappush, heapreplace
+from itertools import count
+from typing import Callable, Generic, Hashable, Iterator, List, Tuple, TypeVar
+
+from .chromosome import Chromosome
+
+C = TypeVar("C", bound=Chromosome)
+
+
+class HallOfFame(Generic[C]):
+    # The ``maxsize`` fittest distinct genomes ever offered. A min-heap keyed
+    # by fitness keeps the weakest member on top, so an insert costs
+    # O(log maxsize) and anything not beating it is rejected in O(1).
+    # Members are stored as copies (Chromosome.copy): individuals are
+    # mutated in place by the GA, and a reference would drift away from the
+    # fitness it was recorded with.
+
+    def __init__(self, maxsize: int = 10) -> None:
+        if maxsize < 1:
+            raise ValueError("O hall da fama deve ter ao menos 1 posição")
+
+        self.maxsize = maxsize
+        self._heap: List[Tuple[float, int, Hashable, C]] = []
+        self._keys: set[Hashable] = set()
+        self._order = count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, individual: C) -> bool:
+        return individual.genetic_information() in self._keys
+
+    def __iter__(self) -> Iterator[C]:
+        return iter(self.members())
+
+    @property
+    def threshold(self) -> float:
+        # Fitness a new genome must beat to enter.
+        if len(self._heap) < self.maxsize:
+            return float("-inf")
+        return self._heap[0][0]
+
+    def update(self, individual: C, fitness: float) -> bool:
+        if fitness <= self.threshold:
+            return False
+
+        key = individual.genetic_information()
+        if key in self._keys:
+            return False
+
+        # The insertion counter breaks fitness ties (first come stays ahead)
+        # and keeps the heap from ever comparing two chromosomes.
+        entry = (fitness, -next(self._order), key, individual.copy())
+        if len(self._heap) < self.maxsize:
+            heappush(self._heap, entry)
+        else:
+            self._keys.discard(heapreplace(self._heap, entry)[2])
+
+        self._keys.add(key)
+        return True
+
+    def update_all(self, population: List[C], fitnesses: List[float]) -> int:
+        return sum(
+            self.update(individual, fitness)
+            for individual, fitness in zip(population, fitnesses)
+            if fitness > self.threshold
+        )
+
+    def items(self) -> List[Tuple[C, float]]:
+        ordered = sorted(self._heap, reverse=True)
+        return [(individual, fitness) for fitness, _, _, individual in ordered]
+
+    def members(self) -> List[C]:
+        return [individual for individual, _ in self.items()]
+
+    @property
+    def best(self) -> Tuple[C, float]:
+        return self.items()[0]
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._keys.clear()
+
+    def rescore(self, evaluate: Callable[[List[C]], List[float]]) -> None:
+        members = self.members()
+        self.clear()
+        self.update_all(members, evaluate(members))
@@ -1,13 +1,123 @@
-from concurrent.futures import ThreadPoolExecutor
-from typing import Generic, TypeVar
+import random
+import numpy as np
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from enum import Enum
+from multiprocessing import Manager
+from threading import Event
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+from src.genetic_alghoritm.checkpoint import IslandCheckpoints
 from src.genetic_alghoritm.chromosome import Chromosome
+from src.genetic_alghoritm.fitness_cache import FitnessCache
 from src.genetic_alghoritm.genetic_algorithm import GeneticAlgorithm
+from src.genetic_alghoritm.hall_of_fame import HallOfFame
+from src.genetic_alghoritm.observers import GenerationObserver
+from src.genetic_alghoritm.termination import TerminationCriteria
+from src.genetic_alghoritm.migration import (
+    MigrationChannel,
+    MigrationPolicy,
+    MigrationTopology,
+)
 
 C = TypeVar("C", bound=Chromosome)
 
 
+def _evolve_island(
+    island: GeneticAlgorithm,
+    chromosome_type: type[Chromosome],
+    index: int,
+    context: Any,
+    channel: MigrationChannel,
+    migration: dict,
+    checkpoints: Optional[IslandCheckpoints] = None,
+) -> list:
+    interval = migration["interval"]
+    migrating = bool(interval) and channel.islands > 1
+    if not migrating and checkpoints is None:
+        return island.run()
+
+    policy: MigrationPolicy = migration["policy"]
+    step = interval if migrating else checkpoints.interval
+
+    try:
+        if checkpoints is not None:
+            checkpoints.save(index, island.state(), final=island.finished)
+
+        while not island.finished:
+            previous = island.generation
+            island.evolve(step)
+            if island.finished:
+                break
+
+            if migrating:
+                epoch = island.generation // interval
+                emigrants = island.emigrants(
+                    migration["migrants"], best=policy.sends_best
+                )
+                channel.send(
+                    index, epoch, [individual.to_genome() for individual in emigrants]
+                )
+
+                immigrants = [
+                    chromosome_type.from_genome(genome, context)
+                    for genome in channel.receive(index, epoch)
+                ]
+                island.immigrate(immigrants, replace_worst=policy.replaces_worst)
+
+            if checkpoints is not None and checkpoints.due(previous, island.generation):
+                checkpoints.save(index, island.state())
+
+        if checkpoints is not None:
+            checkpoints.save(index, island.state(), final=True)
+    finally:
+        if migrating:
+            channel.depart(index)
+
+    return island.run()
+
+
+def _run_island_in_process(
+    chromosome_type: type[Chromosome],
+    genomes: list[Hashable],
+    shared_context: Any,
+    seed: int,
+    settings: dict,
+    index: int,
+    channel: MigrationChannel,
+    migration: dict,
+    checkpoints: Optional[IslandCheckpoints] = None,
+    state: Optional[dict] = None,
+) -> tuple[list[Hashable], dict, Optional[list[GenerationObserver]]]:
+    context = chromosome_type.attach_context(shared_context)
+
+    if state is not None:
+        island = GeneticAlgorithm.restore(state, context, island=index, **settings)
+    else:
+        random.seed(seed)
+        np.random.seed(seed % 2**32)
+        population = [chromosome_type.from_genome(g, context) for g in genomes]
+        island = GeneticAlgorithm(initial_population=population, island=index, **settings)
+
+    elite = _evolve_island(
+        island, chromosome_type, index, context, channel, migration, checkpoints
+    )
+
+    # Observers are sent back so the parent can merge what they collected.
+    observers = settings["observers"]
+    for observer in observers or []:
+        observer.close()
+
+    return [individual.to_genome() for individual in elite], island.stats(), observers
+
+
 class IslandModelGeneticAlgorithm(Generic[C]):
+    ExecutorType = Enum(
+        "ExecutorType",
+        "THREAD PROCESS",
+        qualname="IslandModelGeneticAlgorithm.ExecutorType",
+    )
 
     def __init__(
         self,
@@ -18,6 +128,18 @@ class IslandModelGeneticAlgorithm(Generic[C]):
         mutation_chance=0.01,
         crossover_chance=0.7,
         selection_type=GeneticAlgorithm.SelectionType.TOURNAMENT,
+        fitness_cache: FitnessCache = None,
+        executor_type: ExecutorType = ExecutorType.THREAD,
+        migration_interval: int = 10,
+        migrants: int = 2,
+        migration_topology: MigrationTopology = MigrationTopology.RING,
+        migration_policy: MigrationPolicy = MigrationPolicy.BEST_REPLACE_WORST,
+        termination: TerminationCriteria = None,
+        observers: list[GenerationObserver] = None,
+        checkpoint_dir: str = None,
+        checkpoint_interval: int = 10,
+        hall_of_fame_size: int = 10,
+        deduplicate: bool = False,
     ):
         self._islands_numbers = islands_numbers
         self._population = initial_population
@@ -26,30 +148,237 @@ class IslandModelGeneticAlgorithm(Generic[C]):
         self._mutation_chance = mutation_chance
         self._crossover_chance = crossover_chance
         self._selection_type = selection_type
+        self._executor_type = executor_type
+        self._migration = dict(
+            interval=migration_interval,
+            migrants=migrants,
+            policy=migration_policy,
+        )
+        self._migration_topology = migration_topology
+        self._termination = termination or TerminationCriteria()
+        self._observers = observers
+        self._checkpoint_dir = checkpoint_dir
+        self._checkpoint_interval = checkpoint_interval
+        self._hall_of_fame_size = hall_of_fame_size
+        self._deduplicate = deduplicate
+        self._channel_seed: Optional[int] = None
+        self._resume_states: Optional[list[dict]] = None
+        self._sub_populations: Optional[list[list[C]]] = None
         self._fitness_key = type(self._population[0]).fitness
+        self.fitness_cache = (
+            fitness_cache if fitness_cache is not None else FitnessCache()
+        )
+        self.island_stats: list[dict] = []
 
-    def run(self):
-        futures = []
-        sub_population_size = len(self._population) // self._islands_numbers
-        sub_populations = [
-            self._population[i : i + sub_population_size]
-            for i in range(0, len(self._population), sub_population_size)
-        ]
-
-        with ThreadPoolExecutor(max_workers=self._islands_numbers) as executor:
-            for population in sub_populations:
-                island = GeneticAlgorithm(
-                    initial_population=population,
-                    threshold=self._threshold,
-                    max_generations=self._max_generations,
-                    mutation_chance=self._mutation_chance,
-                    crossover_chance=self._crossover_chance,
-                    selection_type=self._selection_type,
+    def _island_settings(self, stop_event) -> dict:
+        return dict(
+            termination=replace(self._termination, stop_event=stop_event),
+            threshold=self._threshold,
+            max_generations=self._max_generations,
+            mutation_chance=self._mutation_chance,
+            crossover_chance=self._crossover_chance,
+            selection_type=self._selection_type,
+            observers=self._observers,
+            hall_of_fame_size=self._hall_of_fame_size,
+            deduplicate=self._deduplicate,
+        )
+
+    def _split_population(self) -> list[list[C]]:
+        islands = min(self._islands_numbers, len(self._population))
+        sub_population_size, remainder = divmod(len(self._population), islands)
+
+        sub_populations, start = [], 0
+        for index in range(islands):
+            end = start + sub_population_size + (1 if index < remainder else 0)
+            sub_populations.append(self._population[start:end])
+            start = end
+
+        return sub_populations
+
+    def _checkpoints(self, islands: int) -> Optional[IslandCheckpoints]:
+        if self._checkpoint_dir is None:
+            return None
+        return IslandCheckpoints(self._checkpoint_dir, islands, self._checkpoint_interval)
+
+    def _run_settings(self) -> dict:
+        return dict(
+            threshold=self._threshold,
+            islands_numbers=self._islands_numbers,
+            max_generations=self._max_generations,
+            mutation_chance=self._mutation_chance,
+            crossover_chance=self._crossover_chance,
+            selection_type=self._selection_type,
+            executor_type=self._executor_type,
+            migration_interval=self._migration["interval"],
+            migrants=self._migration["migrants"],
+            migration_topology=self._migration_topology,
+            migration_policy=self._migration["policy"],
+            termination=replace(self._termination, stop_event=None),
+            checkpoint_dir=self._checkpoint_dir,
+            checkpoint_interval=self._checkpoint_interval,
+            hall_of_fame_size=self._hall_of_fame_size,
+            deduplicate=self._deduplicate,
+        )
+
+    def _run_threads(self, sub_populations: list[list[C]]) -> list[C]:
+        context = (
+            self._population[0].genome_context()
+            if self._migration["interval"] or self._resume_states
+            else None
+        )
+        channel = MigrationChannel.for_threads(
+            len(sub_populations), self._migration_topology, self._channel_seed
+        )
+        checkpoints = self._checkpoints(len(sub_populations))
+
+        stop_event = self._termination.stop_event or Event()
+
+        islands, futures = [], []
+        with ThreadPoolExecutor(max_workers=len(sub_populations)) as executor:
+            for index, population in enumerate(sub_populations):
+                if self._resume_states:
+                    island = GeneticAlgorithm.restore(
+                        self._resume_states[index],
+                        context,
+                        fitness_cache=self.fitness_cache,
+                        island=index,
+                        **self._island_settings(stop_event),
+                    )
+                else:
+                    island = GeneticAlgorithm(
+                        initial_population=population,
+                        fitness_cache=self.fitness_cache,
+                        island=index,
+                        **self._island_settings(stop_event),
+                    )
+                islands.append(island)
+                futures.append(
+                    executor.submit(
+                        _evolve_island,
+                        island,
+                        type(population[0]),
+                        index,
+                        context,
+                        channel,
+                        self._migration,
+                        checkpoints,
+                    )
                 )
-                futures.append(executor.submit(island.run))
 
         results = []
         for future in futures:
             results.extend(future.result())
 
+        self.island_stats = [island.stats() for island in islands]
+        return results
+
+    def _run_processes(self, sub_populations: list[list[C]]) -> list[C]:
+        chromosome_type = type(self._population[0])
+        context = self._population[0].genome_context()
+        shared_context = chromosome_type.share_context(context)
+        checkpoints = self._checkpoints(len(sub_populations))
+        states = self._resume_states or [None] * len(sub_populations)
+
+        futures = []
+        try:
+            with Manager() as manager, ProcessPoolExecutor(
+                max_workers=len(sub_populations)
+            ) as executor:
+                channel = MigrationChannel.for_processes(
+                    manager,
+                    len(sub_populations),
+                    self._migration_topology,
+                    self._channel_seed,
+                )
+                stop_event = self._termination.stop_event or manager.Event()
+                for index, population in enumerate(sub_populations):
+                    futures.append(
+                        executor.submit(
+                            _run_island_in_process,
+                            chromosome_type,
+                            [individual.to_genome() for individual in population],
+                            shared_context,
+                            random.getrandbits(63),
+                            self._island_settings(stop_event),
+                            index,
+                            channel,
+                            self._migration,
+                            checkpoints,
+                            states[index],
+                        )
+                    )
+
+                results, self.island_stats = [], []
+                for future in futures:
+                    genomes, stats, observers = future.result()
+                    self.island_stats.append(stats)
+                    for observer, remote in zip(self._observers or [], observers or []):
+                        observer.merge(remote)
+                    results.extend(
+                        chromosome_type.from_genome(genome, context)
+                        for genome in genomes
+                    )
+        finally:
+            chromosome_type.release_context(shared_context)
+
         return results
+
+    def run(self):
+        sub_populations = self._sub_populations or self._split_population()
+
+        if self._channel_seed is None:
+            self._channel_seed = random.getrandbits(32)
+
+        checkpoints = self._checkpoints(len(sub_populations))
+        if checkpoints is not None:
+            checkpoints.save_run(
+                dict(
+                    self._run_settings(),
+                    channel_seed=self._channel_seed,
+                    islands=len(sub_populations),
+                )
+            )
+
+        if self._executor_type == IslandModelGeneticAlgorithm.ExecutorType.PROCESS:
+            results = self._run_processes(sub_populations)
+        else:
+            results = self._run_threads(sub_populations)
+
+        if checkpoints is not None:
+            checkpoints.clear_intermediate()
+
+        # The islands' halls of fame merged into one, best first.
+        hall_of_fame = HallOfFame(self._hall_of_fame_size)
+        hall_of_fame.update_all(results, self.fitness_cache.evaluate(results))
+        return hall_of_fame.members()
+
+    @classmethod
+    def resume(cls, checkpoint_dir: str, context: Any, **overrides):
+        # Continues a checkpointed run from the last consistent generation of
+        # every island. Process islands continue bit-for-bit; thread islands
+        # share the global RNG, so their interleaving is not reproducible.
+        settings = IslandCheckpoints.load_run(checkpoint_dir)
+        channel_seed = settings.pop("channel_seed")
+        islands = settings.pop("islands")
+        settings.update(checkpoint_dir=checkpoint_dir, **overrides)
+
+        states = IslandCheckpoints(
+            checkpoint_dir, islands, settings["checkpoint_interval"]
+        ).resume_states()
+
+        populations = []
+        for state in states:
+            individuals = [
+                state["chromosome_type"].from_genome(genome, context)
+                for genome in state["genomes"]
+            ]
+            populations.append([individuals[i] for i in state["population"]])
+
+        algorithm = cls(
+            initial_population=[i for population in populations for i in population],
+            **settings,
+        )
+        algorithm._channel_seed = channel_seed
+        algorithm._resume_states = states
+        algorithm._sub_populations = populations
+        return algorithm
@@ -0,0 +1,114 @@
+from __future__ import annotations
+from enum import Enum
+from queue import Queue
+from random import Random
+from typing import Any, Dict, Hashable, List, Set, Tuple
+
+
+class MigrationTopology(Enum):
+    RING = "ring"
+    FULLY_CONNECTED = "fully_connected"
+    RANDOM = "random"
+
+
+class MigrationPolicy(Enum):
+    BEST_REPLACE_WORST = "best_replace_worst"
+    RANDOM_REPLACE_WORST = "random_replace_worst"
+    BEST_REPLACE_RANDOM = "best_replace_random"
+
+    @property
+    def sends_best(self) -> bool:
+        return self != MigrationPolicy.RANDOM_REPLACE_WORST
+
+    @property
+    def replaces_worst(self) -> bool:
+        return self != MigrationPolicy.BEST_REPLACE_RANDOM
+
+
+class MigrationChannel:
+    # One inbox per island. Messages carry the epoch they belong to so a
+    # fast island sending epoch e+1 never gets mixed into epoch e. Inboxes
+    # are queue.Queue for threads and Manager().Queue() proxies for
+    # processes; both pickle/copy cleanly into the island workers.
+
+    def __init__(
+        self,
+        inboxes: List[Any],
+        topology: MigrationTopology = MigrationTopology.RING,
+        seed: int = 0,
+    ) -> None:
+        self._inboxes = inboxes
+        self._topology = topology
+        self._seed = seed
+        self._pending: Dict[Tuple[int, int], Dict[int, List[Hashable]]] = {}
+        self._departed: Dict[int, Set[int]] = {}
+
+    @classmethod
+    def for_threads(
+        cls, islands: int, topology: MigrationTopology, seed: int = 0
+    ) -> MigrationChannel:
+        return cls([Queue() for _ in range(islands)], topology, seed)
+
+    @classmethod
+    def for_processes(
+        cls, manager, islands: int, topology: MigrationTopology, seed: int = 0
+    ) -> MigrationChannel:
+        return cls([manager.Queue() for _ in range(islands)], topology, seed)
+
+    @property
+    def islands(self) -> int:
+        return len(self._inboxes)
+
+    def _random_permutation(self, epoch: int) -> List[int]:
+        rng = Random(self._seed * 1_000_003 + epoch)
+        permutation = list(range(self.islands))
+        while any(i == target for i, target in enumerate(permutation)):
+            rng.shuffle(permutation)
+        return permutation
+
+    def destinations(self, island: int, epoch: int) -> List[int]:
+        if self.islands < 2:
+            return []
+
+        if self._topology == MigrationTopology.RING:
+            return [(island + 1) % self.islands]
+
+        if self._topology == MigrationTopology.FULLY_CONNECTED:
+            return [i for i in range(self.islands) if i != island]
+
+        return [self._random_permutation(epoch)[island]]
+
+    def sources(self, island: int, epoch: int) -> List[int]:
+        return [
+            source
+            for source in range(self.islands)
+            if island in self.destinations(source, epoch)
+        ]
+
+    def send(self, island: int, epoch: int, genomes: List[Hashable]) -> None:
+        for destination in self.destinations(island, epoch):
+            self._inboxes[destination].put((epoch, island, genomes))
+
+    def depart(self, island: int) -> None:
+        # Tells every other island that no more migrants will come from
+        # ``island`` (it stopped early or failed), so nobody blocks on it.
+        for destination in range(self.islands):
+            if destination != island:
+                self._inboxes[destination].put((None, island, None))
+
+    def receive(self, island: int, epoch: int) -> List[Hashable]:
+        sources = set(self.sources(island, epoch))
+        departed = self._departed.setdefault(island, set())
+        messages = self._pending.pop((island, epoch), {})
+
+        while not sources <= messages.keys() | departed:
+            message_epoch, sender, genomes = self._inboxes[island].get()
+
+            if message_epoch is None:
+                departed.add(sender)
+            elif message_epoch == epoch:
+                messages[sender] = genomes
+            else:
+                self._pending.setdefault((island, message_epoch), {})[sender] = genomes
+
+        return [genome for genomes in messages.values() for genome in genomes]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from random import random
+from typing import Generic, List, Optional, TypeVar
+
+import numpy as np
+
+from . import selection
+from .chromosome import Chromosome
+from .fitness_cache import FitnessCache
+
+C = TypeVar("C", bound=Chromosome)
+
+
+def dominance_matrix(objectives: np.ndarray) -> np.ndarray:
+    # [i, j] is True when i dominates j: no worse in every objective and
+    # strictly better in at least one (all objectives maximized).
+    left, right = objectives[:, None, :], objectives[None, :, :]
+    return (left >= right).all(axis=2) & (left > right).any(axis=2)
+
+
+def non_dominated_sort(objectives: np.ndarray) -> np.ndarray:
+    # Front index of every individual (0 is the Pareto front). Each front is
+    # peeled off at once by discounting its dominations from the counters.
+    dominates = dominance_matrix(objectives)
+    dominated_by = dominates.sum(axis=0)
+    ranks = np.full(len(objectives), -1)
+
+    rank, front = 0, np.flatnonzero(dominated_by == 0)
+    while front.size:
+        ranks[front] = rank
+        dominated_by -= dominates[front].sum(axis=0)
+        dominated_by[front] = -1
+        rank, front = rank + 1, np.flatnonzero(dominated_by == 0)
+
+    return ranks
+
+
+def crowding_distance(objectives: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    distance = np.zeros(len(objectives))
+
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        front = objectives[members]
+
+        order = np.argsort(front, axis=0, kind="stable")
+        ordered = np.take_along_axis(front, order, axis=0)
+        span = ordered[-1] - ordered[0]
+
+        gaps = np.full(front.shape, np.inf)
+        gaps[1:-1] = (ordered[2:] - ordered[:-2]) / np.where(span > 0, span, 1.0)
+
+        contribution = np.empty_like(gaps)
+        np.put_along_axis(contribution, order, gaps, axis=0)
+        distance[members] = contribution.sum(axis=1)
+
+    return distance
+
+
+class NSGA2(Generic[C]):
+    # Multi-objective counterpart of GeneticAlgorithm over
+    # Chromosome.batch_objectives (all maximized). Offspring are generated
+    # with the chromosomes' own crossover and mutate, parents and offspring
+    # compete together, and survivors are chosen by front and crowding.
+    # run() returns the Pareto front of the final population.
+
+    def __init__(
+        self,
+        initial_population: List[C],
+        max_generations: int = 100,
+        mutation_chance: float = 0.01,
+        crossover_chance: float = 0.7,
+        objectives_cache: Optional[FitnessCache] = None,
+    ) -> None:
+        self._population = initial_population
+        self._max_generations = max_generations
+        self._mutation_chance = mutation_chance
+        self._crossover_chance = crossover_chance
+        self._cache = (
+            objectives_cache
+            if objectives_cache is not None
+            else FitnessCache(evaluator="batch_objectives")
+        )
+        self._objectives: np.ndarray = np.empty((0, 0))
+        self._ranks: np.ndarray = np.empty(0, dtype=np.int64)
+        self._crowding: np.ndarray = np.empty(0)
+        self._generation = 0
+        self._evaluations = 0
+
+    def _evaluate(self, population: List[C]) -> np.ndarray:
+        values, evaluated = self._cache.evaluate_counting(population)
+        self._evaluations += evaluated
+        return np.asarray(values, dtype=np.float64).reshape(len(population), -1)
+
+    def _offspring(self) -> List[C]:
+        size = len(self._population)
+        parents = selection.crowded_tournament(
+            self._ranks, self._crowding, 2 * ((size + 1) // 2)
+        ).reshape(-1, 2)
+
+        children: List[C] = []
+        for first, second in parents:
+            first, second = self._population[first], self._population[second]
+
+            if (
+                random() < self._crossover_chance
+                and first.genetic_information() != second.genetic_information()
+            ):
+                children.extend(first.crossover(second))
+            else:
+                children.extend((first.copy(), second.copy()))
+
+        children = children[:size]
+        for child in children:
+            if random() < self._mutation_chance:
+                child.mutate()
+
+        return children
+
+    def _survive(self, candidates: List[C], objectives: np.ndarray) -> None:
+        ranks = non_dominated_sort(objectives)
+        crowding = crowding_distance(objectives, ranks)
+        survivors = np.lexsort((-crowding, ranks))[: len(self._population)]
+
+        self._population = [candidates[i] for i in survivors]
+        self._objectives = objectives[survivors]
+        self._ranks = ranks[survivors]
+        self._crowding = crowding[survivors]
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def evaluations(self) -> int:
+        return self._evaluations
+
+    def evolve(self, generations: int) -> None:
+        if not len(self._objectives):
+            self._survive(self._population, self._evaluate(self._population))
+
+        for _ in range(min(generations, self._max_generations - self._generation)):
+            children = self._offspring()
+            objectives = np.vstack([self._objectives, self._evaluate(children)])
+            self._survive(self._population + children, objectives)
+            self._generation += 1
+
+    def pareto_front(self) -> tuple[List[C], np.ndarray]:
+        # Front members with duplicated genomes collapsed to one.
+        seen, members = set(), []
+        for index in np.flatnonzero(self._ranks == 0):
+            genome = self._population[index].genetic_information()
+            if genome not in seen:
+                seen.add(genome)
+                members.append(index)
+
+        return [self._population[i] for i in members], self._objectives[members]
+
+    def run(self) -> List[C]:
+        self.evolve(self._max_generations - self._generation)
+
+        return self.pareto_front()[0]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+import json
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import List, Optional
+
+
+@dataclass
+class GenerationEvent:
+    island: Optional[int]
+    generation: int
+    best_fitness: float
+    generation_best_fitness: float
+    mean_fitness: float
+    std_fitness: float
+    diversity: float
+    selection_seconds: float
+    crossover_seconds: float
+    mutation_seconds: float
+    evaluation_seconds: float
+    elapsed_seconds: float
+    evaluations: int
+    cache_hits: int
+    cache_misses: int
+
+
+class GenerationObserver(ABC):
+
+    @abstractmethod
+    def on_generation(self, event: GenerationEvent) -> None: ...
+
+    def merge(self, other: GenerationObserver) -> None:
+        # Called with the copy of this observer that ran in a worker process.
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class ConsoleObserver(GenerationObserver):
+
+    def on_generation(self, event: GenerationEvent) -> None:
+        print(
+            f"Generation {event.generation} Best {event.best_fitness} Avg {event.mean_fitness}"
+        )
+
+
+class MemoryCollector(GenerationObserver):
+    # Shipped to island processes empty; the worker's copy is sent back with
+    # only the events it recorded, so merging never duplicates the events
+    # this collector already held (from an earlier run or before a resume).
+
+    def __init__(self) -> None:
+        self.events: List[GenerationEvent] = []
+        self._lock = Lock()
+        self._remote = False
+
+    def on_generation(self, event: GenerationEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def merge(self, other: MemoryCollector) -> None:
+        with self._lock:
+            self.events.extend(other.events)
+
+    def __getstate__(self):
+        return {"events": self.events if self._remote else []}
+
+    def __setstate__(self, state) -> None:
+        self.__init__()
+        self.events = state["events"]
+        self._remote = True
+
+
+class JsonLinesSink(GenerationObserver):
+    # One JSON object per line, appended. The file is opened lazily so the
+    # sink can be pickled into island processes, each appending its lines.
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._file = None
+        self._lock = Lock()
+
+    def on_generation(self, event: GenerationEvent) -> None:
+        line = json.dumps(asdict(event)) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._path, "a", buffering=1)
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __getstate__(self):
+        return {"path": self._path}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state["path"])
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def _wheel(fitnesses: np.ndarray) -> np.ndarray:
+    weights = fitnesses - min(fitnesses.min(), 0.0)
+    cumulative = np.cumsum(weights)
+
+    if cumulative[-1] <= 0:
+        return np.arange(1, len(fitnesses) + 1, dtype=np.float64)
+
+    return cumulative
+
+
+def roulette(fitnesses: np.ndarray, pairs: int) -> np.ndarray:
+    cumulative = _wheel(fitnesses)
+    draws = np.random.random(2 * pairs) * cumulative[-1]
+    indexes = np.searchsorted(cumulative, draws, side="right")
+
+    return np.minimum(indexes, len(fitnesses) - 1).reshape(pairs, 2)
+
+
+def stochastic_universal_sampling(fitnesses: np.ndarray, pairs: int) -> np.ndarray:
+    cumulative = _wheel(fitnesses)
+    step = cumulative[-1] / (2 * pairs)
+    pointers = np.random.random() * step + step * np.arange(2 * pairs)
+    indexes = np.minimum(
+        np.searchsorted(cumulative, pointers, side="right"), len(fitnesses) - 1
+    )
+    np.random.shuffle(indexes)
+
+    return indexes.reshape(pairs, 2)
+
+
+def tournament(fitnesses: np.ndarray, pairs: int, size: int) -> np.ndarray:
+    # Top two of ``size`` uniform draws (with replacement), sampled directly
+    # from the order statistics of uniforms: U_(k) = V1^(1/k) and
+    # U_(k-1) = U_(k) * V2^(1/(k-1)). Mapping U to a fitness rank keeps the
+    # draw exact while costing O(1) per pair instead of O(size).
+    if size < 2:
+        raise ValueError("O torneio deve ter ao menos 2 participantes")
+
+    population_size = len(fitnesses)
+    ranking = np.argsort(fitnesses, kind="stable")
+
+    first = np.random.random(pairs) ** (1 / size)
+    second = first * np.random.random(pairs) ** (1 / (size - 1))
+
+    ranks = (np.stack([first, second], axis=1) * population_size).astype(np.int64)
+
+    return ranking[np.minimum(ranks, population_size - 1)]
+
+
+def crowded_tournament(
+    ranks: np.ndarray, crowding: np.ndarray, count: int
+) -> np.ndarray:
+    # NSGA-II binary tournament: lower front wins, then larger crowding.
+    first, second = np.random.randint(len(ranks), size=(2, count))
+    second_wins = (ranks[second] < ranks[first]) | (
+        (ranks[second] == ranks[first]) & (crowding[second] > crowding[first])
+    )
+
+    return np.where(second_wins, second, first)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional
+
+
+class StopReason(Enum):
+    MAX_GENERATIONS = "max_generations"
+    THRESHOLD = "threshold"
+    PLATEAU = "plateau"
+    DIVERSITY = "diversity"
+    TIME_BUDGET = "time_budget"
+    EVALUATION_BUDGET = "evaluation_budget"
+    EXTERNAL = "external"
+
+
+@dataclass(frozen=True)
+class TerminationCriteria:
+    # All criteria are optional and combined with OR; the fitness threshold
+    # itself is the GeneticAlgorithm ``threshold`` argument. ``stop_event``
+    # is any object with set()/is_set() (threading.Event, Manager().Event())
+    # and lets one island stop the others.
+    patience: Optional[int] = None
+    min_diversity: Optional[float] = None
+    max_seconds: Optional[float] = None
+    max_evaluations: Optional[int] = None
+    stop_event: Any = None
+    stop_all_on_threshold: bool = True
@@ -25,6 +25,14 @@ class IMarketEngine(ABC):
     def get_calmar_ratio(self, wallet: list[Stock] = None) -> float:
         pass
 
+    @abstractmethod
+    def get_portfolio_metrics(self, wallet: list[Stock] = None):
+        pass
+
+    @abstractmethod
+    def get_population_metrics(self, wallets: list[list[Stock]]):
+        pass
+
     @abstractmethod
     def get_random_distribuited_wallet(
         wallet: list[str], total_number_of_stocks: int = 100
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Optional
+
+from src.models.stock import FundamentalData
+
+
+@dataclass
+class FetchFailure:
+    ticker: str
+    error: str
+    error_type: str
+
+
+@dataclass
+class FundamentalsFetchResult:
+    data: dict[str, FundamentalData] = field(default_factory=dict)
+    failures: list[FetchFailure] = field(default_factory=list)
+    cache_hits: int = 0
+
+
+class FundamentalsCache:
+    # FundamentalData per ticker with its fetch timestamp. Entries older than
+    # ttl_seconds are treated as missing. With a path the cache is persisted
+    # as JSON (Infinity/NaN allowed, debt_ebitda can be inf); without one it
+    # only lives in memory.
+
+    def __init__(
+        self, path: Optional[str] = None, ttl_seconds: float = 7 * 24 * 3600
+    ) -> None:
+        self._path = Path(path) if path else None
+        self._ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        self._entries: dict[str, dict] = {}
+
+        if self._path is not None and self._path.exists():
+            self._entries = json.loads(self._path.read_text())
+
+    def get(self, ticker: str) -> Optional[FundamentalData]:
+        with self._lock:
+            entry = self._entries.get(ticker)
+
+        if entry is None or time.time() - entry["fetched_at"] > self._ttl_seconds:
+            return None
+
+        return FundamentalData(**entry["data"])
+
+    def put(self, ticker: str, data: FundamentalData) -> None:
+        with self._lock:
+            self._entries[ticker] = {"fetched_at": time.time(), "data": asdict(data)}
+
+    def save(self) -> None:
+        if self._path is None:
+            return
+
+        with self._lock:
+            payload = json.dumps(self._entries, indent=2, sort_keys=True)
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self._path.with_suffix(".tmp")
+        temporary.write_text(payload)
+        os.replace(temporary, self._path)
+
+
+def fetch_fundamentals(
+    tickers: list[str],
+    fetch: Callable[[str], FundamentalData],
+    cache: Optional[FundamentalsCache] = None,
+    max_workers: int = 8,
+) -> FundamentalsFetchResult:
+    result = FundamentalsFetchResult()
+
+    pending = []
+    for ticker in tickers:
+        cached = cache.get(ticker) if cache is not None else None
+        if cached is None:
+            pending.append(ticker)
+        else:
+            result.data[ticker] = cached
+            result.cache_hits += 1
+
+    def fetch_one(ticker: str):
+        try:
+            return ticker, fetch(ticker), None
+        except Exception as e:
+            return ticker, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending) or 1))) as executor:
+        for ticker, data, error in executor.map(fetch_one, pending):
+            if error is not None:
+                result.failures.append(
+                    FetchFailure(ticker, str(error), type(error).__name__)
+                )
+                continue
+
+            result.data[ticker] = data
+            if cache is not None:
+                cache.put(ticker, data)
+
+    if cache is not None and pending:
+        cache.save()
+
+    result.data = {t: result.data[t] for t in tickers if t in result.data}
+    return result
@@ -0,0 +1,311 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import numpy as np
+
+from src.models.stock import FundamentalData
+from src.market.fundamentals_cache import FetchFailure, FundamentalsCache
+from src.market.returns_market_engine import ReturnsMarketEngine
+
+T = TypeVar("T")
+
+# (timestamps as datetime64[ns], adjusted close prices as float64)
+PriceSeries = tuple[np.ndarray, np.ndarray]
+
+
+class MarketTransport(ABC):
+
+    @abstractmethod
+    async def fetch_prices(
+        self, ticker: str, start: str, end: str, interval: str
+    ) -> PriceSeries: ...
+
+    @abstractmethod
+    async def fetch_fundamentals(self, ticker: str) -> FundamentalData: ...
+
+
+class YahooTransport(MarketTransport):
+    # yfinance is blocking, so every call runs in a worker thread. Prices go
+    # through Ticker.history: unlike yfinance.download it keeps no global
+    # state and is safe to call from several threads at once.
+
+    async def fetch_prices(
+        self, ticker: str, start: str, end: str, interval: str
+    ) -> PriceSeries:
+        return await asyncio.to_thread(self._download_prices, ticker, start, end, interval)
+
+    async def fetch_fundamentals(self, ticker: str) -> FundamentalData:
+        from src.market.yahoo_finance_market_engine import YahooFinanceMarketEngine
+
+        return await asyncio.to_thread(
+            YahooFinanceMarketEngine.download_fundamentalist_data, ticker
+        )
+
+    @staticmethod
+    def _download_prices(ticker: str, start: str, end: str, interval: str) -> PriceSeries:
+        import yfinance
+
+        history = yfinance.Ticker(ticker).history(
+            start=start, end=end, interval=interval, auto_adjust=False
+        )
+        if history is None or history.empty:
+            raise ValueError(f"Sem preços disponíveis para {ticker}")
+
+        adj_close = history["Adj Close"].dropna()
+        index = adj_close.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+
+        return index.values.astype("datetime64[ns]"), adj_close.to_numpy(np.float64)
+
+
+class FixtureTransport(MarketTransport):
+    # Offline stand-in reading files written by ``write``:
+    #   {root}/prices/{ticker}.json   {"dates": [...], "adj_close": [...]}
+    #   {root}/fundamentals.json      {ticker: FundamentalData fields}
+    # ``latency`` simulates network time per call and ``flaky`` makes the
+    # first n calls for a ticker raise ConnectionError, to exercise retries.
+
+    def __init__(
+        self, root: str, latency: float = 0.0, flaky: dict[str, int] = None
+    ) -> None:
+        self._root = Path(root)
+        self._latency = latency
+        self._flaky = dict(flaky or {})
+
+    async def _simulate(self, ticker: str) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+        if self._flaky.get(ticker, 0) > 0:
+            self._flaky[ticker] -= 1
+            raise ConnectionError(f"Falha simulada para {ticker}")
+
+    async def fetch_prices(
+        self, ticker: str, start: str, end: str, interval: str
+    ) -> PriceSeries:
+        await self._simulate(ticker)
+
+        path = self._root / "prices" / f"{ticker}.json"
+        if not path.exists():
+            raise ValueError(f"Sem preços disponíveis para {ticker}")
+
+        payload = json.loads(path.read_text())
+        dates = np.array(payload["dates"], dtype="datetime64[ns]")
+        prices = np.array(payload["adj_close"], dtype=np.float64)
+
+        window = (dates >= np.datetime64(start)) & (dates < np.datetime64(end))
+        return dates[window], prices[window]
+
+    async def fetch_fundamentals(self, ticker: str) -> FundamentalData:
+        await self._simulate(ticker)
+
+        path = self._root / "fundamentals.json"
+        fundamentals = json.loads(path.read_text()) if path.exists() else {}
+        if ticker not in fundamentals:
+            raise ValueError(f"Sem dados fundamentalistas disponíveis para {ticker}")
+
+        return FundamentalData(**fundamentals[ticker])
+
+    @staticmethod
+    def write(
+        root: str,
+        prices: dict[str, PriceSeries],
+        fundamentals: dict[str, FundamentalData],
+    ) -> None:
+        root = Path(root)
+        (root / "prices").mkdir(parents=True, exist_ok=True)
+
+        for ticker, (dates, adj_close) in prices.items():
+            payload = dict(
+                dates=[str(d) for d in np.asarray(dates, dtype="datetime64[ns]")],
+                adj_close=np.asarray(adj_close, dtype=np.float64).tolist(),
+            )
+            (root / "prices" / f"{ticker}.json").write_text(json.dumps(payload))
+
+        (root / "fundamentals.json").write_text(
+            json.dumps({t: asdict(d) for t, d in fundamentals.items()}, indent=2)
+        )
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    # Exponential backoff with full jitter. ``permanent`` errors are not
+    # retried: ValueError is how the engines report data that does not exist.
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    permanent: tuple[type[BaseException], ...] = (ValueError,)
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+@dataclass
+class IngestionResult:
+    prices: dict[str, PriceSeries] = field(default_factory=dict)
+    fundamentals: dict[str, FundamentalData] = field(default_factory=dict)
+    failures: list[FetchFailure] = field(default_factory=list)
+    cache_hits: int = 0
+    seconds: float = 0.0
+
+    def returns(self) -> tuple[list[str], np.ndarray]:
+        # Aligns every series on the union of timestamps, forward-fills gaps
+        # (holidays of other exchanges) and drops the leading rows without a
+        # return, as pct_change().dropna() does on the yfinance frame.
+        tickers = list(self.prices)
+        if not tickers:
+            raise ValueError("Nenhuma série de preços foi carregada")
+
+        dates = np.unique(np.concatenate([self.prices[t][0] for t in tickers]))
+        matrix = np.full((len(dates), len(tickers)), np.nan)
+        for column, ticker in enumerate(tickers):
+            series_dates, series_prices = self.prices[ticker]
+            matrix[np.searchsorted(dates, series_dates), column] = series_prices
+
+        last_seen = np.where(np.isnan(matrix), 0, np.arange(len(dates))[:, None])
+        np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+        matrix = matrix[last_seen, np.arange(len(tickers))]
+
+        returns = matrix[1:] / matrix[:-1] - 1
+        return tickers, returns[~np.isnan(returns).any(axis=1)]
+
+    def to_engine(self, risk_free_rate: float = 0.0, **options) -> ReturnsMarketEngine:
+        tickers, returns = self.returns()
+        return ReturnsMarketEngine(
+            tickers=tickers,
+            returns=returns,
+            risk_free_rate=risk_free_rate,
+            fundamentals=self.fundamentals,
+            **options,
+        )
+
+
+class MarketDataLoader:
+    # Downloads prices and fundamentals of all tickers concurrently, at most
+    # ``max_concurrency`` calls in flight and, when ``requests_per_second`` is
+    # set, calls started no closer than 1 / requests_per_second apart.
+
+    def __init__(
+        self,
+        transport: MarketTransport = None,
+        max_concurrency: int = 8,
+        retry: RetryPolicy = RetryPolicy(),
+        requests_per_second: Optional[float] = None,
+        fundamentals_cache: FundamentalsCache = None,
+    ) -> None:
+        self._transport = transport or YahooTransport()
+        self._max_concurrency = max_concurrency
+        self._retry = retry
+        self._requests_per_second = requests_per_second
+        self._fundamentals_cache = fundamentals_cache
+
+    async def _throttle(self) -> None:
+        if not self._requests_per_second:
+            return
+
+        async with self._rate_lock:
+            wait = self._next_request - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_request = (
+                max(time.monotonic(), self._next_request) + 1 / self._requests_per_second
+            )
+
+    async def _call(self, ticker: str, call: Callable[[], Awaitable[T]]) -> T:
+        for attempt in range(self._retry.attempts):
+            try:
+                async with self._semaphore:
+                    await self._throttle()
+                    return await call()
+            except self._retry.permanent:
+                raise
+            except Exception as e:
+                if attempt == self._retry.attempts - 1:
+                    raise
+                logging.getLogger(__name__).info(
+                    "Nova tentativa para %s após erro: %s", ticker, e
+                )
+                await asyncio.sleep(self._retry.delay(attempt))
+
+    async def _collect(self, ticker: str, call, into: dict, result: IngestionResult):
+        try:
+            into[ticker] = await self._call(ticker, call)
+        except Exception as e:
+            result.failures.append(FetchFailure(ticker, str(e), type(e).__name__))
+
+    async def load(
+        self,
+        tickers: list[str],
+        start: str,
+        end: str,
+        interval: str = "1d",
+        fundamentals: bool = True,
+    ) -> IngestionResult:
+        started = time.perf_counter()
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._rate_lock = asyncio.Lock()
+        self._next_request = 0.0
+
+        result = IngestionResult()
+        prices: dict[str, PriceSeries] = {}
+        # Cache hits are kept apart from fresh downloads: only the latter are
+        # written back, so a hit does not reset its entry's TTL.
+        cached_fundamentals: dict[str, FundamentalData] = {}
+        fetched: dict[str, FundamentalData] = {}
+
+        tasks = [
+            self._collect(
+                ticker,
+                lambda t=ticker: self._transport.fetch_prices(t, start, end, interval),
+                prices,
+                result,
+            )
+            for ticker in tickers
+        ]
+
+        if fundamentals:
+            for ticker in tickers:
+                cached = (
+                    self._fundamentals_cache.get(ticker)
+                    if self._fundamentals_cache is not None
+                    else None
+                )
+                if cached is not None:
+                    cached_fundamentals[ticker] = cached
+                    result.cache_hits += 1
+                    continue
+
+                tasks.append(
+                    self._collect(
+                        ticker,
+                        lambda t=ticker: self._transport.fetch_fundamentals(t),
+                        fetched,
+                        result,
+                    )
+                )
+
+        await asyncio.gather(*tasks)
+
+        if self._fundamentals_cache is not None and fundamentals:
+            for ticker, data in fetched.items():
+                self._fundamentals_cache.put(ticker, data)
+            self._fundamentals_cache.save()
+
+        result.prices = {t: prices[t] for t in tickers if t in prices}
+        fundamentals_data = {**cached_fundamentals, **fetched}
+        result.fundamentals = {
+            t: fundamentals_data[t] for t in tickers if t in fundamentals_data
+        }
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def load_sync(self, *args, **kwargs) -> IngestionResult:
+        return asyncio.run(self.load(*args, **kwargs))
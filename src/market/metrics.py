@@ -0,0 +1,48 @@
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def sharpe_ratios(portfolio_returns: np.ndarray, risk_free_rate: float) -> np.ndarray:
+    excess_returns = portfolio_returns - risk_free_rate / TRADING_DAYS
+
+    vol = portfolio_returns.std(axis=0, ddof=1)
+    vol = np.maximum(vol, 1e-8)
+
+    return (excess_returns.mean(axis=0) / vol) * np.sqrt(TRADING_DAYS)
+
+
+def sortino_ratios(portfolio_returns: np.ndarray, risk_free_rate: float) -> np.ndarray:
+    excess_returns = portfolio_returns - risk_free_rate / TRADING_DAYS
+    negative_returns = np.minimum(excess_returns, 0)
+
+    downside = np.sqrt((negative_returns**2).mean(axis=0)) * np.sqrt(TRADING_DAYS)
+    downside = np.maximum(downside, 1e-8)
+
+    annualized_ret = (1 + portfolio_returns.mean(axis=0)) ** TRADING_DAYS - 1
+
+    return (annualized_ret - risk_free_rate) / downside
+
+
+def calmar_ratios(portfolio_returns: np.ndarray) -> np.ndarray:
+    equity = np.cumprod(1 + portfolio_returns, axis=0)
+
+    n_days = len(equity)
+    annualized_ret = (equity[-1] / equity[0]) ** (TRADING_DAYS / n_days) - 1
+
+    dd = (equity / np.maximum.accumulate(equity, axis=0)) - 1
+    max_dd = dd.min(axis=0)
+
+    flat = np.abs(max_dd) < 1e-6
+    return np.where(flat, 0.0, annualized_ret / np.where(flat, 1.0, np.abs(max_dd)))
+
+
+def risk_metrics(
+    portfolio_returns: np.ndarray, risk_free_rate: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # portfolio_returns is T x P: one column of daily returns per portfolio
+    return (
+        sharpe_ratios(portfolio_returns, risk_free_rate),
+        sortino_ratios(portfolio_returns, risk_free_rate),
+        calmar_ratios(portfolio_returns),
+    )
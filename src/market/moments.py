@@ -0,0 +1,57 @@
+import numpy as np
+
+from src.market.metrics import TRADING_DAYS
+
+
+class PortfolioMoments:
+    # Asset mean vector, covariance and downside semicovariance, computed
+    # once from the T x N returns; portfolio moments are then quadratic forms
+    # over the wallet's K x K block, independent of the history length.
+    # The covariance uses ddof=1, so Sharpe equals the path computation. The
+    # semicovariance (Estrada) of the excess returns below the risk-free rate
+    # only approximates the portfolio downside deviation used by Sortino: it
+    # counts each asset's bad days rather than the portfolio's.
+
+    def __init__(self, returns: np.ndarray, risk_free_rate: float) -> None:
+        returns = np.asarray(returns, dtype=np.float64)
+        self.risk_free_rate = risk_free_rate
+
+        self.mean = returns.mean(axis=0)
+        centered = returns - self.mean
+        self.covariance = centered.T @ centered / (len(returns) - 1)
+
+        downside = np.minimum(returns - risk_free_rate / TRADING_DAYS, 0)
+        self.semicovariance = downside.T @ downside / len(returns)
+
+    @staticmethod
+    def _quadratic(
+        matrix: np.ndarray, indexes: np.ndarray, weights: np.ndarray
+    ) -> np.ndarray:
+        # indexes is P x K (one column set per wallet) or a 1-D column set
+        # shared by every row of the P x K weights.
+        if indexes.ndim == 1:
+            block = matrix[np.ix_(indexes, indexes)]
+            return ((weights @ block) * weights).sum(axis=1)
+
+        blocks = matrix[indexes[:, :, None], indexes[:, None, :]]
+        return np.einsum("pk,pkl,pl->p", weights, blocks, weights)
+
+    def portfolio_means(self, indexes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        return (self.mean[indexes] * weights).sum(axis=1)
+
+    def sharpe_ratios(self, indexes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        variance = self._quadratic(self.covariance, indexes, weights)
+        vol = np.maximum(np.sqrt(np.maximum(variance, 0)), 1e-8)
+
+        excess = self.portfolio_means(indexes, weights) - self.risk_free_rate / TRADING_DAYS
+        return excess / vol * np.sqrt(TRADING_DAYS)
+
+    def sortino_ratios(self, indexes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        downside_variance = self._quadratic(self.semicovariance, indexes, weights)
+        downside = np.sqrt(np.maximum(downside_variance, 0)) * np.sqrt(TRADING_DAYS)
+        downside = np.maximum(downside, 1e-8)
+
+        mean = self.portfolio_means(indexes, weights)
+        annualized_ret = (1 + mean) ** TRADING_DAYS - 1
+
+        return (annualized_ret - self.risk_free_rate) / downside
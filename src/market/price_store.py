@@ -0,0 +1,149 @@
+from __future__ import annotations
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+# pandas is only needed to fetch and to build frames; loading the stored
+# arrays works without it.
+if TYPE_CHECKING:
+    import pandas as pd
+
+# fetch(tickers, start, end) -> DataFrame of Adj Close, one column per ticker
+PriceFetcher = Callable[[list[str], str, str], "pd.DataFrame"]
+
+
+class PriceStore:
+    # One pair of .npy files per ticker (timestamps and adjusted close) plus
+    # a manifest with the contiguous [start, end) range already fetched.
+    # Files are loaded memory-mapped, so opening the store costs no copy.
+    MANIFEST = "manifest.json"
+
+    def __init__(self, root: str, interval: str = "1d") -> None:
+        self._root = Path(root) / interval
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = self._root / self.MANIFEST
+        self._manifest: dict[str, dict[str, str]] = (
+            json.loads(self._manifest_path.read_text())
+            if self._manifest_path.exists()
+            else {}
+        )
+
+    def _paths(self, ticker: str) -> tuple[Path, Path]:
+        return self._root / f"{ticker}.dates.npy", self._root / f"{ticker}.npy"
+
+    def _save_manifest(self) -> None:
+        temporary = self._manifest_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self._manifest, indent=2, sort_keys=True))
+        os.replace(temporary, self._manifest_path)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._manifest
+
+    def coverage(self, ticker: str) -> tuple[str, str]:
+        entry = self._manifest[ticker]
+        return entry["start"], entry["end"]
+
+    def load(self, ticker: str) -> tuple[np.ndarray, np.ndarray]:
+        if ticker not in self._manifest:
+            raise ValueError(f"Sem preços locais para {ticker}")
+
+        dates_path, prices_path = self._paths(ticker)
+        return np.load(dates_path, mmap_mode="r"), np.load(prices_path, mmap_mode="r")
+
+    def missing_ranges(self, ticker: str, start: str, end: str) -> list[tuple[str, str]]:
+        import pandas as pd
+
+        end = min(pd.Timestamp(end), pd.Timestamp.today().normalize() + pd.Timedelta(days=1))
+        start = pd.Timestamp(start)
+
+        if ticker not in self._manifest:
+            return [(str(start.date()), str(end.date()))]
+
+        covered_start, covered_end = map(pd.Timestamp, self.coverage(ticker))
+        ranges = []
+        if start < covered_start:
+            ranges.append((str(start.date()), str(covered_start.date())))
+        if end > covered_end:
+            ranges.append((str(covered_end.date()), str(end.date())))
+
+        return ranges
+
+    def write(
+        self, ticker: str, dates: np.ndarray, prices: np.ndarray, start: str, end: str
+    ) -> None:
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        prices = np.asarray(prices, dtype=np.float64)
+
+        if ticker in self._manifest:
+            stored_dates, stored_prices = self.load(ticker)
+            dates = np.concatenate([np.asarray(stored_dates), dates])
+            prices = np.concatenate([np.asarray(stored_prices), prices])
+            start = min(start, self._manifest[ticker]["start"])
+            end = max(end, self._manifest[ticker]["end"])
+
+        # Newly fetched rows win over stored ones for the same timestamp.
+        _, last = np.unique(dates[::-1], return_index=True)
+        keep = np.sort(len(dates) - 1 - last)
+        dates, prices = dates[keep], prices[keep]
+
+        dates_path, prices_path = self._paths(ticker)
+        for path, values in ((dates_path, dates), (prices_path, prices)):
+            temporary = path.with_suffix(".tmp.npy")
+            np.save(temporary, values)
+            os.replace(temporary, path)
+
+        self._manifest[ticker] = {"start": start, "end": end}
+        self._save_manifest()
+
+    def update(self, tickers: list[str], start: str, end: str, fetch: PriceFetcher) -> None:
+        import pandas as pd
+
+        ranges: dict[tuple[str, str], list[str]] = {}
+        for ticker in tickers:
+            for missing in self.missing_ranges(ticker, start, end):
+                ranges.setdefault(missing, []).append(ticker)
+
+        for (range_start, range_end), group in ranges.items():
+            adj_close = fetch(group, range_start, range_end)
+            for ticker in group:
+                series = (
+                    adj_close[ticker].dropna()
+                    if ticker in adj_close.columns
+                    else pd.Series(dtype=np.float64)
+                )
+                # A failed download (or a ticker missing from the frame) is
+                # not recorded as covered, so the range is fetched again on
+                # the next update instead of leaving a permanent gap.
+                if series.empty:
+                    logging.getLogger(__name__).warning(
+                        "Nenhum preço obtido para %s entre %s e %s",
+                        ticker,
+                        range_start,
+                        range_end,
+                    )
+                    continue
+
+                self.write(
+                    ticker,
+                    series.index.values,
+                    series.to_numpy(),
+                    range_start,
+                    range_end,
+                )
+
+    def adj_close(self, tickers: list[str], start: str, end: str) -> pd.DataFrame:
+        import pandas as pd
+
+        start, end = np.datetime64(pd.Timestamp(start)), np.datetime64(pd.Timestamp(end))
+
+        columns = {}
+        for ticker in tickers:
+            dates, prices = self.load(ticker)
+            window = (dates >= start) & (dates < end)
+            columns[ticker] = pd.Series(prices[window], index=dates[window])
+
+        return pd.DataFrame(columns)
@@ -0,0 +1,224 @@
+import logging
+import random
+import numpy as np
+
+from src.models.stock import FundamentalData, Stock
+from src.market.base import IMarketEngine
+from src.market.fundamentals_cache import FundamentalsFetchResult, fetch_fundamentals
+from src.market.metrics import TRADING_DAYS, calmar_ratios, risk_metrics
+from src.market.moments import PortfolioMoments
+from src.market.walk_forward import WalkForward
+
+
+class ReturnsMarketEngine(IMarketEngine):
+
+    def __init__(
+        self,
+        tickers: list[str],
+        returns: np.ndarray,
+        risk_free_rate: float = 0.0,
+        fundamentals: dict[str, FundamentalData] = None,
+        walk_forward: WalkForward = None,
+        dtype: np.dtype = np.float64,
+        moments: bool = False,
+    ) -> None:
+        self.tickers = list(tickers)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        # Stored asset-major (one contiguous row of returns per ticker) and
+        # exposed as the days x tickers view ``returns``: gathering a wallet's
+        # columns reads a few contiguous rows, however wide the universe is.
+        # float32 halves the memory; portfolio returns are always float64.
+        self.asset_returns = np.ascontiguousarray(np.asarray(returns).T, dtype=dtype)
+        self.returns = self.asset_returns.T
+        self.risk_free_rate = risk_free_rate
+        self._fundamentals = fundamentals or {}
+        self.walk_forward = walk_forward
+        # Bumped whenever the returns change (a streaming bar), so fitness
+        # cached for an older window is never reused.
+        self.revision = 0
+
+        # Sharpe and Sortino from precomputed moments; only Calmar's
+        # drawdown still walks the portfolio path.
+        if moments and walk_forward is not None:
+            raise ValueError("O modo de momentos não pode ser combinado com walk_forward")
+        self.moments = PortfolioMoments(self.returns, risk_free_rate) if moments else None
+
+    def _wallet_weights(self, wallet: list[Stock] = None):
+        if wallet:
+            columns = np.array([self.ticker_index[s.ticker] for s in wallet])
+            amounts = np.array([s.amount for s in wallet], dtype=np.float64)
+        else:
+            columns = np.arange(len(self.tickers))
+            amounts = np.ones(len(self.tickers))
+
+        return columns, amounts / amounts.sum()
+
+    def get_portfolio_series(self, wallet: list[Stock] = None):
+        columns, weights = self._wallet_weights(wallet)
+
+        portfolio_returns = self.returns[:, columns] @ weights
+
+        portfolio_equity = np.cumprod(1 + portfolio_returns)
+
+        return portfolio_returns, portfolio_equity, weights
+
+    def _risk_metrics(self, portfolio_returns: np.ndarray):
+        if self.walk_forward is not None:
+            return self.walk_forward.risk_metrics(portfolio_returns, self.risk_free_rate)
+
+        return risk_metrics(portfolio_returns, self.risk_free_rate)
+
+    def get_returns_metrics(self, portfolio_returns: np.ndarray):
+        return self._risk_metrics(portfolio_returns)
+
+    def get_portfolio_metrics(self, wallet: list[Stock] = None):
+        if self.moments is not None:
+            columns, weights = self._wallet_weights(wallet)
+            sharpe, sortino, calmar = self.get_sparse_metrics(columns, weights[None])
+
+            return float(sharpe[0]), float(sortino[0]), float(calmar[0])
+
+        portfolio_returns, _, _ = self.get_portfolio_series(wallet)
+
+        sharpe, sortino, calmar = self._risk_metrics(portfolio_returns)
+
+        return float(sharpe), float(sortino), float(calmar)
+
+    def to_sparse_wallets(self, wallets: list[list[Stock]], normalize: bool = True):
+        # (index, weight) pairs per wallet as two P x K arrays, K being the
+        # largest wallet; shorter wallets are padded with zero weights.
+        size = max(len(wallet) for wallet in wallets)
+        indexes = np.zeros((len(wallets), size), dtype=np.intp)
+        amounts = np.zeros((len(wallets), size))
+        for row, wallet in enumerate(wallets):
+            for position, stock in enumerate(wallet):
+                indexes[row, position] = self.ticker_index[stock.ticker]
+                amounts[row, position] = stock.amount
+
+        if not normalize:
+            return indexes, amounts
+        return indexes, amounts / amounts.sum(axis=1, keepdims=True)
+
+    def get_sparse_returns(self, indexes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        # Gathers only the union of the population's columns, so the cost
+        # depends on the wallets and not on the size of the universe.
+        # A 1-D ``indexes`` is one column set shared by every row of weights.
+        if indexes.ndim == 1:
+            return self.returns[:, indexes] @ weights.T
+
+        columns, positions = np.unique(indexes, return_inverse=True)
+        dense = np.zeros((len(indexes), len(columns)))
+        rows = np.repeat(np.arange(len(indexes)), indexes.shape[1])
+        np.add.at(dense, (rows, positions.ravel()), weights.ravel())
+
+        return self.returns[:, columns] @ dense.T
+
+    def get_sparse_metrics(self, indexes: np.ndarray, weights: np.ndarray):
+        portfolio_returns = self.get_sparse_returns(indexes, weights)
+
+        if self.moments is not None:
+            return (
+                self.moments.sharpe_ratios(indexes, weights),
+                self.moments.sortino_ratios(indexes, weights),
+                calmar_ratios(portfolio_returns),
+            )
+
+        return self._risk_metrics(portfolio_returns)
+
+    def get_population_metrics(self, wallets: list[list[Stock]]):
+        return self.get_sparse_metrics(*self.to_sparse_wallets(wallets))
+
+    def get_weights_metrics(self, weights: np.ndarray):
+        columns = np.flatnonzero(np.any(weights != 0, axis=0))
+
+        return self.get_sparse_metrics(columns, weights[:, columns])
+
+    def get_sharpe_ratio(self, wallet: list[Stock] = None):
+        if self.moments is not None:
+            columns, weights = self._wallet_weights(wallet)
+            return float(self.moments.sharpe_ratios(columns, weights[None])[0])
+
+        return self.get_portfolio_metrics(wallet)[0]
+
+    def get_sortino_ratio(self, wallet: list[Stock] = None):
+        if self.moments is not None:
+            columns, weights = self._wallet_weights(wallet)
+            return float(self.moments.sortino_ratios(columns, weights[None])[0])
+
+        return self.get_portfolio_metrics(wallet)[1]
+
+    def get_calmar_ratio(self, wallet: list[Stock] = None):
+        return self.get_portfolio_metrics(wallet)[2]
+
+    def get_wallet_volatiliy(self, quantities) -> float:
+        weighted_returns = self.returns @ np.asarray(quantities, dtype=np.float64)
+        volatility = weighted_returns.std() * np.sqrt(TRADING_DAYS)
+
+        return float(volatility)
+
+    def get_wallet_mean_return(self, quantities) -> float:
+        weighted_returns = self.returns @ np.asarray(quantities, dtype=np.float64)
+        excess_return = weighted_returns.mean() - self.risk_free_rate
+
+        return float(excess_return)
+
+    @staticmethod
+    def get_random_distribuited_wallet(
+        wallet: list[str], total_number_of_stocks: int = 100
+    ) -> list[Stock]:
+
+        def split_into_random_numbers(total_sum, parts):
+            cuts = sorted(random.sample(range(1, total_sum), parts - 1))
+            final_parts = []
+
+            prev = 0
+            for cut in cuts:
+                final_parts.append(cut - prev)
+                prev = cut
+            final_parts.append(total_sum - prev)
+
+            return final_parts
+
+        distribuition_of_wallet = split_into_random_numbers(
+            total_number_of_stocks, len(wallet)
+        )
+
+        distribuited_wallet = []
+        for ticker, distribuition in zip(wallet, distribuition_of_wallet):
+            distribuited_wallet.append(Stock(ticker=ticker, amount=distribuition))
+
+        return distribuited_wallet
+
+    @staticmethod
+    def get_random_assets_wallet(
+        tickers: list[str], min_assets: int = 3, max_assets: int = 10
+    ) -> list[str]:
+        number_of_assets = random.randint(min_assets, max_assets)
+        selected_tickers = random.sample(tickers, number_of_assets)
+
+        return selected_tickers
+
+    def get_fundamentalist_data(self, ticker: str) -> FundamentalData:
+        if ticker not in self._fundamentals:
+            raise ValueError(f"Sem dados fundamentalistas disponíveis para {ticker}")
+
+        return self._fundamentals[ticker]
+
+    def fetch_multiple_fundamentalist_data(
+        self, tickers: list[str], max_workers: int = 8
+    ) -> FundamentalsFetchResult:
+        return fetch_fundamentals(
+            tickers, self.get_fundamentalist_data, max_workers=max_workers
+        )
+
+    def get_multiple_fundamentalist_data(
+        self, tickers: list[str]
+    ) -> dict[str, FundamentalData]:
+        result = self.fetch_multiple_fundamentalist_data(tickers)
+        for failure in result.failures:
+            logging.getLogger(__name__).warning(
+                "Erro ao obter dados fundamentais para %s: %s",
+                failure.ticker,
+                failure.error,
+            )
+        return result.data
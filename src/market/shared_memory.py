@@ -0,0 +1,80 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from src.market.moments import PortfolioMoments
+from src.market.returns_market_engine import ReturnsMarketEngine
+from src.market.walk_forward import WalkForward
+
+
+class SharedMarketData:
+
+    def __init__(
+        self,
+        name: str,
+        shape: tuple[int, ...],
+        dtype: str,
+        tickers: list[str],
+        risk_free_rate: float,
+        walk_forward: WalkForward = None,
+        moments: PortfolioMoments = None,
+    ) -> None:
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self.tickers = tickers
+        self.risk_free_rate = risk_free_rate
+        self.walk_forward = walk_forward
+        self.moments = moments
+        self._shared_memory: SharedMemory = None
+
+    @classmethod
+    def from_engine(cls, engine: ReturnsMarketEngine) -> "SharedMarketData":
+        asset_returns = engine.asset_returns
+        shared_memory = SharedMemory(create=True, size=max(asset_returns.nbytes, 1))
+        buffer = np.ndarray(
+            asset_returns.shape, dtype=asset_returns.dtype, buffer=shared_memory.buf
+        )
+        buffer[:] = asset_returns
+
+        shared = cls(
+            name=shared_memory.name,
+            shape=asset_returns.shape,
+            dtype=asset_returns.dtype.str,
+            tickers=engine.tickers,
+            risk_free_rate=engine.risk_free_rate,
+            walk_forward=engine.walk_forward,
+            moments=engine.moments,
+        )
+        shared._shared_memory = shared_memory
+
+        return shared
+
+    def attach(self) -> ReturnsMarketEngine:
+        shared_memory = SharedMemory(name=self.name)
+        asset_returns = np.ndarray(
+            self.shape, dtype=self.dtype, buffer=shared_memory.buf
+        )
+
+        engine = ReturnsMarketEngine(
+            tickers=self.tickers,
+            returns=asset_returns.T,
+            dtype=asset_returns.dtype,
+            risk_free_rate=self.risk_free_rate,
+            walk_forward=self.walk_forward,
+        )
+        engine.moments = self.moments
+        engine._shared_memory = shared_memory
+
+        return engine
+
+    def release(self) -> None:
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shared_memory"] = None
+        return state
@@ -0,0 +1,77 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.models.stock import FundamentalData
+from src.market.returns_market_engine import ReturnsMarketEngine
+from src.market.walk_forward import WalkForward
+
+
+class EngineSnapshot:
+    # A pre-built ReturnsMarketEngine on disk: the asset-major returns as
+    # returns.npy plus engine.json with the tickers and options. Attaching
+    # memory-maps the returns, so any number of workers share the page cache
+    # and start without pandas, yfinance or a network call. The handle is
+    # just a path, so it pickles for free into spawned processes and can be
+    # used wherever a SharedMarketData is expected. ``source`` records how
+    # the engine was built (e.g. universe, days, seed) so a caller reusing
+    # the directory can tell a stale snapshot from the one it wants.
+    RETURNS = "returns.npy"
+    META = "engine.json"
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+
+    @classmethod
+    def save(
+        cls, engine: ReturnsMarketEngine, path: str, source: Optional[dict] = None
+    ) -> "EngineSnapshot":
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        np.save(path / cls.RETURNS, np.ascontiguousarray(engine.asset_returns))
+        meta = dict(
+            tickers=engine.tickers,
+            risk_free_rate=engine.risk_free_rate,
+            fundamentals={t: asdict(d) for t, d in engine._fundamentals.items()},
+            walk_forward=asdict(engine.walk_forward) if engine.walk_forward else None,
+            moments=engine.moments is not None,
+            source=source,
+        )
+        (path / cls.META).write_text(json.dumps(meta))
+
+        return cls(path)
+
+    @property
+    def source(self) -> Optional[dict]:
+        return json.loads((self.path / self.META).read_text()).get("source")
+
+    def attach(self) -> ReturnsMarketEngine:
+        meta = json.loads((self.path / self.META).read_text())
+        if not (self.path / self.RETURNS).exists():
+            raise ValueError(f"Snapshot de engine incompleto em {self.path}")
+
+        asset_returns = np.load(self.path / self.RETURNS, mmap_mode="r")
+        walk_forward = meta["walk_forward"]
+
+        engine = ReturnsMarketEngine(
+            tickers=meta["tickers"],
+            returns=asset_returns.T,
+            dtype=asset_returns.dtype,
+            risk_free_rate=meta["risk_free_rate"],
+            fundamentals={
+                t: FundamentalData(**d) for t, d in meta["fundamentals"].items()
+            },
+            walk_forward=WalkForward(**walk_forward) if walk_forward else None,
+            moments=meta["moments"],
+        )
+        engine.snapshot = self
+
+        return engine
+
+    def release(self) -> None:
+        # The files outlive the run; deleting them is up to the caller.
+        pass
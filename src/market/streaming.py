@@ -0,0 +1,304 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+
+from src.market.metrics import TRADING_DAYS
+from src.market.moments import PortfolioMoments
+from src.market.returns_market_engine import ReturnsMarketEngine
+from src.market.walk_forward import WalkForward
+
+
+@dataclass(frozen=True)
+class Bar:
+    timestamp: np.datetime64
+    prices: dict[str, float]
+
+
+class BarSource(ABC):
+
+    @abstractmethod
+    def bars(self) -> Iterator[Bar]: ...
+
+
+class ReplaySource(BarSource):
+    # Replays a JSON Lines file written by ``write``, one bar per line:
+    #   {"timestamp": "2024-01-02T10:01", "prices": {ticker: price}}
+    # ``delay`` sleeps between bars to mimic the live interval.
+
+    def __init__(self, path: str, delay: float = 0.0) -> None:
+        self._path = Path(path)
+        self._delay = delay
+
+    def bars(self) -> Iterator[Bar]:
+        with self._path.open() as lines:
+            for position, line in enumerate(lines):
+                if not line.strip():
+                    continue
+                if position and self._delay:
+                    time.sleep(self._delay)
+
+                payload = json.loads(line)
+                yield Bar(np.datetime64(payload["timestamp"], "ns"), payload["prices"])
+
+    @staticmethod
+    def write(path: str, bars: Iterable[Bar]) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with path.open("w") as lines:
+            for bar in bars:
+                payload = dict(
+                    timestamp=str(np.datetime64(bar.timestamp, "ns")),
+                    prices={t: float(p) for t, p in bar.prices.items()},
+                )
+                lines.write(json.dumps(payload) + "\n")
+
+
+class YahooBarSource(BarSource):
+    # Polls yfinance every ``poll_seconds`` for the current session's bars and
+    # yields the ones newer than the last bar seen. Never ends by itself.
+
+    def __init__(
+        self, tickers: list[str], interval: str = "1m", poll_seconds: float = 60.0
+    ) -> None:
+        self._tickers = list(tickers)
+        self._interval = interval
+        self._poll_seconds = poll_seconds
+
+    def _download(self):
+        import yfinance
+
+        history = yfinance.download(
+            " ".join(self._tickers),
+            period="1d",
+            interval=self._interval,
+            auto_adjust=False,
+            progress=False,
+        )
+        adj_close = history["Adj Close"]
+        if adj_close.index.tz is not None:
+            adj_close.index = adj_close.index.tz_localize(None)
+        return adj_close
+
+    def bars(self) -> Iterator[Bar]:
+        last_seen = None
+        while True:
+            adj_close = self._download()
+            for timestamp, row in adj_close.iterrows():
+                timestamp = np.datetime64(timestamp, "ns")
+                if last_seen is not None and timestamp <= last_seen:
+                    continue
+
+                last_seen = timestamp
+                yield Bar(timestamp, row.dropna().to_dict())
+
+            time.sleep(self._poll_seconds)
+
+
+class RollingMoments(PortfolioMoments):
+    # PortfolioMoments over a sliding window, kept as running sums of the
+    # returns and of their outer products: a bar entering or leaving the
+    # window costs O(N^2) instead of recomputing over the whole window. The
+    # sums are rebuilt exactly every ``refresh_every`` updates so rounding
+    # errors from the subtractions do not accumulate.
+
+    def __init__(
+        self, returns: np.ndarray, risk_free_rate: float, refresh_every: int = 1_000
+    ) -> None:
+        self.risk_free_rate = risk_free_rate
+        self._refresh_every = refresh_every
+        self.reset(returns)
+
+    def _downside(self, returns: np.ndarray) -> np.ndarray:
+        return np.minimum(returns - self.risk_free_rate / TRADING_DAYS, 0)
+
+    def reset(self, returns: np.ndarray) -> None:
+        returns = np.asarray(returns, dtype=np.float64)
+        downside = self._downside(returns)
+
+        self._count = len(returns)
+        self._sum = returns.sum(axis=0)
+        self._cross = returns.T @ returns
+        self._downside_cross = downside.T @ downside
+        self._updates = 0
+        self._refresh()
+
+    def _refresh(self) -> None:
+        self.mean = self._sum / self._count
+        self.covariance = (
+            self._cross - self._count * np.outer(self.mean, self.mean)
+        ) / max(self._count - 1, 1)
+        self.semicovariance = self._downside_cross / self._count
+
+    def update(
+        self,
+        added: np.ndarray,
+        removed: Optional[np.ndarray],
+        window: np.ndarray,
+    ) -> None:
+        self._updates += 1
+        if self._updates >= self._refresh_every:
+            self.reset(window)
+            return
+
+        added = np.asarray(added, dtype=np.float64)
+        self._count += 1
+        self._sum += added
+        self._cross += np.outer(added, added)
+        downside = self._downside(added)
+        self._downside_cross += np.outer(downside, downside)
+
+        if removed is not None:
+            removed = np.asarray(removed, dtype=np.float64)
+            self._count -= 1
+            self._sum -= removed
+            self._cross -= np.outer(removed, removed)
+            downside = self._downside(removed)
+            self._downside_cross -= np.outer(downside, downside)
+
+        self._refresh()
+
+
+class StreamingMarketEngine(ReturnsMarketEngine):
+    # ReturnsMarketEngine over the last ``capacity`` bars. Returns live in an
+    # asset-major ring buffer written twice (positions i and i + capacity),
+    # so the window in time order is always the contiguous slice
+    # [start, start + length) and ``returns`` is a view: appending a bar
+    # costs O(N) and nothing is rebuilt. The ratios use the same formulas
+    # (and 252-period annualization) as the daily engines, so they rank
+    # wallets consistently but are not annual figures for intraday bars.
+
+    def __init__(
+        self,
+        tickers: list[str],
+        returns: np.ndarray,
+        last_prices: np.ndarray,
+        capacity: int = 390,
+        risk_free_rate: float = 0.0,
+        fundamentals: dict = None,
+        walk_forward: WalkForward = None,
+        dtype: np.dtype = np.float64,
+        moments: bool = False,
+    ) -> None:
+        if capacity < 2:
+            raise ValueError("A capacidade do buffer deve ser de ao menos 2 barras")
+
+        history = np.asarray(returns)[-capacity:]
+        super().__init__(
+            tickers=tickers,
+            returns=history,
+            risk_free_rate=risk_free_rate,
+            fundamentals=fundamentals,
+            walk_forward=walk_forward,
+            dtype=dtype,
+            moments=False,
+        )
+        if moments and walk_forward is not None:
+            raise ValueError("O modo de momentos não pode ser combinado com walk_forward")
+
+        self.capacity = capacity
+        self._buffer = np.zeros((len(self.tickers), 2 * capacity), dtype=dtype)
+        self._buffer[:, : len(history)] = self.asset_returns
+        self._buffer[:, capacity : capacity + len(history)] = self.asset_returns
+        self._length = len(history)
+        self._next = len(history) % capacity
+        self._start = 0
+        self._expose()
+
+        self.last_prices = np.asarray(last_prices, dtype=np.float64).copy()
+        self.last_timestamp: Optional[np.datetime64] = None
+        self.bars = 0
+        self.moments = RollingMoments(self.returns, risk_free_rate) if moments else None
+
+    @classmethod
+    def from_prices(
+        cls, tickers: list[str], prices: np.ndarray, capacity: int = 390, **options
+    ) -> "StreamingMarketEngine":
+        prices = np.asarray(prices, dtype=np.float64)
+        return cls(
+            tickers=tickers,
+            returns=prices[1:] / prices[:-1] - 1,
+            last_prices=prices[-1],
+            capacity=capacity,
+            **options,
+        )
+
+    def _expose(self) -> None:
+        self.asset_returns = self._buffer[:, self._start : self._start + self._length]
+        self.returns = self.asset_returns.T
+
+    def append(self, bar: Bar) -> None:
+        # Tickers missing from the bar keep their last price (zero return);
+        # tickers unknown to the engine are ignored.
+        prices = self.last_prices.copy()
+        for ticker, price in bar.prices.items():
+            column = self.ticker_index.get(ticker)
+            if column is not None and np.isfinite(price) and price > 0:
+                prices[column] = price
+
+        added = prices / self.last_prices - 1
+        removed = self.asset_returns[:, 0].copy() if self._length == self.capacity else None
+
+        self._buffer[:, self._next] = added
+        self._buffer[:, self._next + self.capacity] = added
+        self._next = (self._next + 1) % self.capacity
+        self._length = min(self._length + 1, self.capacity)
+        self._start = (self._next - self._length) % self.capacity
+        self._expose()
+
+        self.last_prices = prices
+        self.last_timestamp = bar.timestamp
+        self.bars += 1
+        self.revision += 1
+
+        if self.moments is not None:
+            self.moments.update(added, removed, self.returns)
+
+
+@dataclass
+class BarUpdate:
+    timestamp: np.datetime64
+    best: Any
+    best_fitness: float
+    seconds: float
+
+
+class LiveReoptimizer:
+    # Drives a GeneticAlgorithm from a BarSource: each bar is appended to the
+    # engine, the population and the elite are re-scored against the new
+    # window (the fitness cache is cleared, since every cached value is for
+    # the previous window) and the search continues for
+    # ``generations_per_bar`` generations.
+
+    def __init__(
+        self,
+        engine: StreamingMarketEngine,
+        algorithm,
+        source: BarSource,
+        generations_per_bar: int = 1,
+    ) -> None:
+        self.engine = engine
+        self.algorithm = algorithm
+        self.source = source
+        self.generations_per_bar = generations_per_bar
+
+    def step(self, bar: Bar) -> BarUpdate:
+        started = time.perf_counter()
+
+        self.engine.append(bar)
+        self.algorithm.rescore()
+        self.algorithm.evolve(self.generations_per_bar)
+
+        best, best_fitness = self.algorithm.best
+        return BarUpdate(bar.timestamp, best, best_fitness, time.perf_counter() - started)
+
+    def run(self, max_bars: Optional[int] = None) -> Iterator[BarUpdate]:
+        for count, bar in enumerate(self.source.bars()):
+            if max_bars is not None and count >= max_bars:
+                break
+            yield self.step(bar)
@@ -0,0 +1,71 @@
+from typing import Union
+
+import numpy as np
+
+from src.models.stock import FundamentalData
+from src.market.metrics import TRADING_DAYS
+from src.market.returns_market_engine import ReturnsMarketEngine
+from src.market.walk_forward import WalkForward
+
+
+class SyntheticMarketEngine(ReturnsMarketEngine):
+    # Correlated geometric Brownian motion prices plus random fundamentals,
+    # fully determined by ``seed``. Used to benchmark and test the GA without
+    # network access. ``drift`` and ``volatility`` are annualized; when no
+    # ``covariance`` (daily, N x N) is given one is built from ``volatility``
+    # and a constant pairwise ``correlation``.
+
+    def __init__(
+        self,
+        tickers: Union[int, list[str]],
+        days: int = TRADING_DAYS,
+        risk_free_rate: float = 0.0,
+        drift: Union[float, np.ndarray] = 0.08,
+        volatility: Union[float, np.ndarray] = 0.25,
+        correlation: float = 0.3,
+        covariance: np.ndarray = None,
+        seed: int = None,
+        walk_forward: WalkForward = None,
+        dtype: np.dtype = np.float64,
+        moments: bool = False,
+    ) -> None:
+        if isinstance(tickers, int):
+            tickers = [f"SYN{i}" for i in range(tickers)]
+
+        rng = np.random.default_rng(seed)
+        n_assets = len(tickers)
+
+        if covariance is None:
+            daily_vol = np.broadcast_to(volatility, n_assets) / np.sqrt(TRADING_DAYS)
+            correlations = np.full((n_assets, n_assets), correlation)
+            np.fill_diagonal(correlations, 1.0)
+            covariance = np.outer(daily_vol, daily_vol) * correlations
+
+        daily_drift = np.broadcast_to(drift, n_assets) / TRADING_DAYS
+        shocks = rng.multivariate_normal(np.zeros(n_assets), covariance, size=days)
+        log_returns = daily_drift - 0.5 * np.diag(covariance) + shocks
+
+        self.prices = 100 * np.exp(
+            np.vstack([np.zeros(n_assets), np.cumsum(log_returns, axis=0)])
+        )
+
+        fundamentals = {
+            ticker: FundamentalData(
+                ticker=ticker,
+                roic=float(rng.normal(0.1, 0.1)),
+                roe=float(rng.normal(0.15, 0.12)),
+                debt_ebitda=float(rng.gamma(2.0, 1.0)),
+                growth_rate=float(rng.normal(0.05, 0.3)),
+            )
+            for ticker in tickers
+        }
+
+        super().__init__(
+            tickers=tickers,
+            returns=np.expm1(log_returns),
+            risk_free_rate=risk_free_rate,
+            fundamentals=fundamentals,
+            walk_forward=walk_forward,
+            dtype=dtype,
+            moments=moments,
+        )
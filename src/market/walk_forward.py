@@ -0,0 +1,119 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.market.metrics import TRADING_DAYS
+
+
+def _prefix_sum(values: np.ndarray) -> np.ndarray:
+    prefix = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=prefix[1:])
+    return prefix
+
+
+def _window_drawdowns(
+    log_path: np.ndarray, starts: np.ndarray, window: int, step: int
+) -> np.ndarray:
+    # Windows start at multiples of ``step`` and span ``window`` days, so both
+    # are whole numbers of blocks of gcd(window, step) days. With each block's
+    # max, min and internal drawdown precomputed once, a window's drawdown is
+    # min over its blocks of min(internal, block min - max of earlier blocks),
+    # costing window / block per window instead of window.
+    block = math.gcd(window, step)
+    n_blocks = (starts[-1] + window) // block
+    blocks = log_path[: n_blocks * block].reshape(n_blocks, block, -1)
+
+    block_max = blocks.max(axis=1)
+    block_min = blocks.min(axis=1)
+    internal = (blocks - np.maximum.accumulate(blocks, axis=1)).min(axis=1)
+
+    indexes = starts[:, None] // block + np.arange(window // block)
+    earlier_max = np.maximum.accumulate(block_max[indexes], axis=1)
+    earlier_max = np.concatenate(
+        [np.full_like(earlier_max[:, :1], np.inf), earlier_max[:, :-1]], axis=1
+    )
+    across = np.where(
+        np.isinf(earlier_max), 0.0, block_min[indexes] - earlier_max
+    )
+
+    return np.minimum(internal[indexes], across).min(axis=1)
+
+
+def window_bounds(n_days: int, window: int, step: int) -> tuple[np.ndarray, np.ndarray]:
+    window = min(window, n_days)
+    starts = np.arange(0, n_days - window + 1, step)
+    return starts, starts + window
+
+
+def rolling_risk_metrics(
+    portfolio_returns: np.ndarray, risk_free_rate: float, window: int, step: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Same ratios as metrics.risk_metrics, for every window [s, s + window)
+    # with s = 0, step, 2*step, ... Returns W x P arrays (W for 1-D input).
+    # Means, volatilities and downside deviations come from prefix sums and
+    # cost O(1) per window; only the drawdown walks each window's path.
+    returns = np.asarray(portfolio_returns, dtype=np.float64)
+    one_dimensional = returns.ndim == 1
+    if one_dimensional:
+        returns = returns[:, None]
+
+    starts, ends = window_bounds(len(returns), window, step)
+    n = ends[0] - starts[0]
+    daily_rf = risk_free_rate / TRADING_DAYS
+
+    # Centering keeps the sum-of-squares variance numerically stable.
+    center = returns.mean(axis=0)
+    sums = _prefix_sum(returns - center)
+    squares = _prefix_sum((returns - center) ** 2)
+    downside_squares = _prefix_sum(np.minimum(returns - daily_rf, 0) ** 2)
+    log_equity = _prefix_sum(np.log1p(returns))
+
+    window_sums = sums[ends] - sums[starts]
+    mean = center + window_sums / n
+    variance = (squares[ends] - squares[starts] - window_sums**2 / n) / (n - 1)
+    vol = np.maximum(np.sqrt(np.maximum(variance, 0)), 1e-8)
+    sharpe = (mean - daily_rf) / vol * np.sqrt(TRADING_DAYS)
+
+    downside = np.sqrt((downside_squares[ends] - downside_squares[starts]) / n)
+    downside = np.maximum(downside * np.sqrt(TRADING_DAYS), 1e-8)
+    sortino = ((1 + mean) ** TRADING_DAYS - 1 - risk_free_rate) / downside
+
+    # Equity inside a window is exp(log_equity[s + 1 : s + n + 1]) up to a
+    # constant factor, which neither the growth ratio nor drawdowns see.
+    annualized = np.expm1(
+        (log_equity[ends] - log_equity[starts + 1]) * TRADING_DAYS / n
+    )
+    max_dd = np.expm1(_window_drawdowns(log_equity[1:], starts, n, step))
+
+    flat = np.abs(max_dd) < 1e-6
+    calmar = np.where(flat, 0.0, annualized / np.where(flat, 1.0, np.abs(max_dd)))
+
+    if one_dimensional:
+        return sharpe[:, 0], sortino[:, 0], calmar[:, 0]
+    return sharpe, sortino, calmar
+
+
+@dataclass(frozen=True)
+class WalkForward:
+    # Scores each portfolio over rolling windows of ``window`` days advanced
+    # by ``step`` days and aggregates every ratio across windows, either by
+    # its mean or by its worst (minimum) value.
+    window: int = TRADING_DAYS // 2
+    step: int = TRADING_DAYS // 12
+    aggregate: str = "mean"
+
+    def __post_init__(self) -> None:
+        if self.aggregate not in ("mean", "worst"):
+            raise ValueError(f"Agregação desconhecida: {self.aggregate}")
+        if self.window < 2 or self.step < 1:
+            raise ValueError("Janela deve ter ao menos 2 dias e passo ao menos 1")
+
+    def risk_metrics(
+        self, portfolio_returns: np.ndarray, risk_free_rate: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        windows = rolling_risk_metrics(
+            portfolio_returns, risk_free_rate, self.window, self.step
+        )
+        reduce = np.mean if self.aggregate == "mean" else np.min
+        return tuple(reduce(ratios, axis=0) for ratios in windows)
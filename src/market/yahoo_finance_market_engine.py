@@ -1,14 +1,57 @@
-import yfinance
-import random
+from __future__ import annotations
+import logging
+from typing import TYPE_CHECKING
+
 import numpy as np
 
-from cachetools.func import lru_cache
+from src.models.stock import FundamentalData
+from src.market.fundamentals_cache import (
+    FundamentalsCache,
+    FundamentalsFetchResult,
+    fetch_fundamentals,
+)
+from src.market.price_store import PriceStore
+from src.market.returns_market_engine import ReturnsMarketEngine
+from src.market.walk_forward import WalkForward
+
+# yfinance and pandas are imported when data is fetched, so importing the
+# engine (or anything that references it) stays cheap for workers.
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def download_history(
+    stocks: list[str], start_date: str, end_date: str, period: str = "1d"
+) -> pd.DataFrame:
+    import yfinance
+
+    return yfinance.download(
+        " ".join(stocks),
+        start=start_date,
+        end=end_date,
+        interval=period,
+        auto_adjust=False,
+    )
+
 
-from src.models.stock import FundamentalData, Stock
-from src.market.base import IMarketEngine
+def returns_from_prices(adj_close: pd.DataFrame) -> tuple[list[str], np.ndarray]:
+    # Tickers without any price (failed downloads) are dropped. A ticker
+    # listed late, delisted or with gaps gets zero returns where it has no
+    # price, instead of removing those dates from the whole universe: a
+    # single ticker must not shorten (or empty) every wallet's history.
+    missing = [t for t in adj_close.columns if adj_close[t].isna().all()]
+    if missing:
+        logging.getLogger(__name__).warning("Sem preços para %s", missing)
+        adj_close = adj_close.drop(columns=missing)
 
+    if adj_close.shape[1] == 0 or len(adj_close) < 2:
+        raise ValueError("Nenhum histórico de preços disponível para os ativos")
 
-class YahooFinanceMarketEngine(IMarketEngine):
+    returns = adj_close.ffill().pct_change(fill_method=None).iloc[1:].fillna(0.0)
+    return list(adj_close.columns), returns.to_numpy()
+
+
+class YahooFinanceMarketEngine(ReturnsMarketEngine):
 
     def __init__(
         self,
@@ -17,123 +60,75 @@ class YahooFinanceMarketEngine(IMarketEngine):
         end_date: str,
         period: str = "1d",
         risk_free_rate: float = 0.0,
+        price_store: PriceStore = None,
+        offline: bool = False,
+        fundamentals_cache: FundamentalsCache = None,
+        walk_forward: WalkForward = None,
+        dtype: np.dtype = np.float64,
+        moments: bool = False,
     ) -> None:
-        self.stock_history = yfinance.download(
-            " ".join(stocks),
-            start=start_date,
-            end=end_date,
-            interval=period,
-            auto_adjust=False,
-        )
-        self.risk_free_rate = risk_free_rate
+        self.fundamentals_cache = fundamentals_cache or FundamentalsCache()
 
-    def get_portfolio_series(self, wallet: list[Stock] = None):
+        if price_store is None:
+            if offline:
+                raise ValueError("O modo offline exige um price_store local")
 
-        if wallet:
-            tickers = [s.ticker for s in wallet]
-            amounts = np.array([s.amount for s in wallet])
-            adj_close = self.stock_history["Adj Close"][tickers]
+            history = download_history(stocks, start_date, end_date, period)
         else:
-            tickers = list(self.stock_history["Adj Close"].columns)
-            adj_close = self.stock_history["Adj Close"]
-            amounts = np.ones(len(tickers))
-
-        weights = amounts / amounts.sum()
-
-        returns = adj_close.pct_change().dropna()
-
-        portfolio_returns = (returns * weights).sum(axis=1)
-
-        portfolio_equity = (1 + portfolio_returns).cumprod()
-
-        return portfolio_returns, portfolio_equity, weights
-
-    def get_sharpe_ratio(self, wallet: list[Stock] = None):
-        portfolio_returns, _, _ = self.get_portfolio_series(wallet)
-        excess_returns = portfolio_returns - self.risk_free_rate / 252
-
-        vol = portfolio_returns.std()
-        vol = max(vol, 1e-8)
-
-        sharpe = (excess_returns.mean() / vol) * np.sqrt(252)
-        return sharpe
-
-    def get_sortino_ratio(self, wallet: list[Stock] = None):
-        portfolio_returns, _, _ = self.get_portfolio_series(wallet)
-        excess_returns = portfolio_returns - self.risk_free_rate / 252
-        negative_returns = np.minimum(excess_returns, 0)
-
-        downside = np.sqrt((negative_returns**2).mean()) * np.sqrt(252)
-        downside = max(downside, 1e-8)
-
-        annualized_ret = (1 + portfolio_returns.mean()) ** 252 - 1
-
-        return (annualized_ret - self.risk_free_rate) / downside
-
-    def get_calmar_ratio(self, wallet: list[Stock] = None):
-        _, equity, _ = self.get_portfolio_series(wallet)
-
-        n_days = len(equity)
-        annualized_ret = (equity.iloc[-1] / equity.iloc[0]) ** (252 / n_days) - 1
-
-        dd = (equity / equity.cummax()) - 1
-        max_dd = dd.min()
-
-        if abs(max_dd) < 1e-6:
-            return 0
-
-        return annualized_ret / abs(max_dd)
-
-    def get_wallet_volatiliy(self, quantities) -> float:
-        weighted_returns = np.dot(self.returns, quantities)
-        volatility = weighted_returns.std() * np.sqrt(252)
-
-        return volatility.sum()
-
-    def get_wallet_mean_return(self, quantities) -> float:
-        weighted_returns = np.dot(self.returns, quantities)
-        excess_return = weighted_returns.mean() - self.risk_free_rate
-
-        return excess_return.sum()
-
-    @staticmethod
-    def get_random_distribuited_wallet(
-        wallet: list[str], total_number_of_stocks: int = 100
-    ) -> list[Stock]:
-
-        def split_into_random_numbers(total_sum, parts):
-            cuts = sorted(random.sample(range(1, total_sum), parts - 1))
-            final_parts = []
-
-            prev = 0
-            for cut in cuts:
-                final_parts.append(cut - prev)
-                prev = cut
-            final_parts.append(total_sum - prev)
-
-            return final_parts
-
-        distribuition_of_wallet = split_into_random_numbers(
-            total_number_of_stocks, len(wallet)
+            import pandas as pd
+
+            if not offline:
+                price_store.update(
+                    stocks,
+                    start_date,
+                    end_date,
+                    fetch=lambda tickers, start, end: download_history(
+                        tickers, start, end, period
+                    )["Adj Close"],
+                )
+
+            history = pd.concat(
+                {"Adj Close": price_store.adj_close(stocks, start_date, end_date)},
+                axis=1,
+            )
+
+        # Only the compact returns matrix is kept: the float64 OHLCV frame of
+        # the whole universe is released here.
+        tickers, returns = returns_from_prices(history["Adj Close"])
+        del history
+        super().__init__(
+            tickers=tickers,
+            returns=returns,
+            risk_free_rate=risk_free_rate,
+            walk_forward=walk_forward,
+            dtype=dtype,
+            moments=moments,
         )
 
-        distribuited_wallet = []
-        for ticker, distribuition in zip(wallet, distribuition_of_wallet):
-            distribuited_wallet.append(Stock(ticker=ticker, amount=distribuition))
-
-        return distribuited_wallet
+    def get_fundamentalist_data(self, ticker: str) -> FundamentalData:
+        cached = self.fundamentals_cache.get(ticker)
+        if cached is not None:
+            return cached
+
+        data = self.download_fundamentalist_data(ticker)
+        self.fundamentals_cache.put(ticker, data)
+        self.fundamentals_cache.save()
+        return data
+
+    def fetch_multiple_fundamentalist_data(
+        self, tickers: list[str], max_workers: int = 8
+    ) -> FundamentalsFetchResult:
+        return fetch_fundamentals(
+            tickers,
+            self.download_fundamentalist_data,
+            cache=self.fundamentals_cache,
+            max_workers=max_workers,
+        )
 
     @staticmethod
-    def get_random_assets_wallet(
-        tickers: list[str], min_assets: int = 3, max_assets: int = 10
-    ) -> list[str]:
-        number_of_assets = random.randint(min_assets, max_assets)
-        selected_tickers = random.sample(tickers, number_of_assets)
-
-        return selected_tickers
+    def download_fundamentalist_data(ticker: str) -> FundamentalData:
+        import yfinance
 
-    @lru_cache(maxsize=128)
-    def get_fundamentalist_data(self, ticker: str) -> FundamentalData:
         t = yfinance.Ticker(ticker)
 
         bs = t.balance_sheet
@@ -186,15 +181,3 @@ class YahooFinanceMarketEngine(IMarketEngine):
             debt_ebitda=debt_ebitda,
             growth_rate=growth_rate,
         )
-
-    def get_multiple_fundamentalist_data(
-        self, tickers: list[str]
-    ) -> dict[str, FundamentalData]:
-        fundamental_data = {}
-        for ticker in tickers:
-            try:
-                data = self.get_fundamentalist_data(ticker)
-                fundamental_data[ticker] = data
-            except ValueError as e:
-                print(f"Erro ao obter dados fundamentais para {ticker}: {e}")
-        return fundamental_data
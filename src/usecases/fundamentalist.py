@@ -1,96 +1,271 @@
+import warnings
+
 import numpy as np
-from random import choice, randint
 
+from src.genetic_alghoritm.array_population import ArrayPopulation, random_true_column
 from src.genetic_alghoritm.chromosome import Chromosome
 
 from src.models.stock import FundamentalData
 
 
-class FundamentalistChromosome(Chromosome):
+def fundamentalist_score(data: FundamentalData) -> float:
+    roic_val = max(data.roic, -0.99)
+    roic_score = roic_val / (abs(roic_val) + 1)
 
-    def __init__(
-        self, tickers: list[str], fundamental_scores: dict[str, FundamentalData]
-    ) -> None:
-        self._fundamental_scores = fundamental_scores
-        self.tickers = tickers
+    roe_val = max(data.roe, -0.99)
+    roe_score = roe_val / (abs(roe_val) + 1)
 
-    def _get_fundamentalist_score(self, ticker: str) -> float:
-        data = self._fundamental_scores[ticker]
+    if data.debt_ebitda <= 0 or np.isnan(data.debt_ebitda):
+        debt_score = 1.0
+    else:
+        debt_score = 1 / (1 + data.debt_ebitda)
+
+    growth_score = (np.tanh(data.growth_rate) + 1) / 2
 
-        roic_val = max(data.roic, -0.99)
-        roic_score = roic_val / (abs(roic_val) + 1)
+    score = (
+        0.35 * roic_score + 0.35 * roe_score + 0.2 * growth_score + 0.1 * debt_score
+    )
 
-        roe_val = max(data.roe, -0.99)
-        roe_score = roe_val / (abs(roe_val) + 1)
+    return score
 
-        if data.debt_ebitda <= 0 or np.isnan(data.debt_ebitda):
-            debt_score = 1.0
-        else:
-            debt_score = 1 / (1 + data.debt_ebitda)
 
-        growth_score = (np.tanh(data.growth_rate) + 1) / 2
+class FundamentalScoreTable:
+    # Scores of the whole ticker universe computed once, plus conversions
+    # between ticker lists, integer bitmasks (bit i = i-th ticker) and
+    # boolean matrices used by the vectorized paths. The table is a snapshot
+    # of the dict it was built from: build a new one after changing it, and
+    # share one table across a population.
 
-        score = (
-            0.35 * roic_score + 0.35 * roe_score + 0.2 * growth_score + 0.1 * debt_score
+    def __init__(self, fundamental_scores: dict[str, FundamentalData]) -> None:
+        self.data = dict(fundamental_scores)
+        self.tickers = list(fundamental_scores.keys())
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.scores = np.array(
+            [fundamentalist_score(fundamental_scores[t]) for t in self.tickers]
         )
+        self.full_mask = (1 << len(self.tickers)) - 1
+        self._nbytes = max(1, (len(self.tickers) + 7) // 8)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def mask_of(self, tickers: list[str]) -> int:
+        mask = 0
+        for ticker in tickers:
+            mask |= 1 << self.index[ticker]
+        return mask
+
+    def indices(self, mask: int) -> np.ndarray:
+        raw = np.frombuffer(mask.to_bytes(self._nbytes, "little"), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+
+    def tickers_of(self, mask: int) -> list[str]:
+        return [self.tickers[i] for i in self.indices(mask)]
+
+    def masks_to_matrix(self, masks: list[int]) -> np.ndarray:
+        raw = np.frombuffer(
+            b"".join(mask.to_bytes(self._nbytes, "little") for mask in masks),
+            dtype=np.uint8,
+        ).reshape(len(masks), self._nbytes)
+        bits = np.unpackbits(raw, axis=1, bitorder="little")
+        return bits[:, : len(self.tickers)].astype(bool)
+
+    def matrix_to_masks(self, matrix: np.ndarray) -> list[int]:
+        packed = np.packbits(matrix, axis=1, bitorder="little")
+        return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+    def mask_from_indices(self, indices: np.ndarray) -> int:
+        row = np.zeros((1, len(self.tickers)), dtype=bool)
+        row[0, indices] = True
+        return self.matrix_to_masks(row)[0]
+
+    def random_bit(self, mask: int) -> int:
+        indices = self.indices(mask)
+        return 1 << int(indices[np.random.randint(len(indices))])
 
-        return score
+
+def score_table_for(
+    fundamental_scores: "dict[str, FundamentalData] | FundamentalScoreTable",
+) -> FundamentalScoreTable:
+    # A plain dict gets a table of its own; pass a prebuilt table to share it.
+    if isinstance(fundamental_scores, FundamentalScoreTable):
+        return fundamental_scores
+    return FundamentalScoreTable(fundamental_scores)
+
+
+class FundamentalistChromosome(Chromosome):
+
+    def __init__(
+        self,
+        tickers: list[str],
+        fundamental_scores: "dict[str, FundamentalData] | FundamentalScoreTable",
+        mask: int = None,
+    ) -> None:
+        if not isinstance(fundamental_scores, FundamentalScoreTable):
+            # One table per chromosome scores the whole universe again for
+            # every individual; warned once per call site.
+            warnings.warn(
+                "FundamentalistChromosome recebeu um dicionário: construa um "
+                "FundamentalScoreTable e compartilhe-o com toda a população",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+        self._table = score_table_for(fundamental_scores)
+        self._fundamental_scores = self._table.data
+        self._mask = mask if mask is not None else self._table.mask_of(tickers)
+
+    # A tuple, so in-place edits fail loudly instead of changing a copy;
+    # assign a new list to change the wallet.
+    @property
+    def tickers(self) -> tuple[str, ...]:
+        return tuple(self._table.tickers_of(self._mask))
+
+    @tickers.setter
+    def tickers(self, tickers: list[str]) -> None:
+        self._mask = self._table.mask_of(tickers)
+
+    def _get_fundamentalist_score(self, ticker: str) -> float:
+        return float(self._table.scores[self._table.index[ticker]])
 
     def genetic_information(self) -> str:
-        return hash(tuple(self.tickers))
+        return self._mask
+
+    def to_genome(self) -> int:
+        return self._mask
+
+    def genome_context(self) -> FundamentalScoreTable:
+        return self._table
+
+    @classmethod
+    def from_genome(
+        cls, genome: int, context: FundamentalScoreTable
+    ) -> "FundamentalistChromosome":
+        return cls(tickers=None, fundamental_scores=context, mask=genome)
 
     def fitness(self) -> float:
-        score_for_tickers = [
-            self._get_fundamentalist_score(ticker) for ticker in self.tickers
-        ]
+        return float(self._table.scores[self._table.indices(self._mask)].mean())
 
-        average_score = sum(score_for_tickers) / len(score_for_tickers)
+    @classmethod
+    def batch_fitness(
+        cls, population: list["FundamentalistChromosome"]
+    ) -> list[float]:
+        table = population[0]._table
+        matrix = table.masks_to_matrix([individual._mask for individual in population])
 
-        return average_score
+        return ((matrix @ table.scores) / matrix.sum(axis=1)).tolist()
 
     def crossover(self, other):
         number_of_sons = 2
         sons = []
 
-        max_son_size = max(len(self.tickers), len(other.tickers))
-        min_son_size = min(len(self.tickers), len(other.tickers))
-        
+        self_size, other_size = self._mask.bit_count(), other._mask.bit_count()
+        max_son_size = max(self_size, other_size)
+        min_son_size = min(self_size, other_size)
+        combined_tickers = self._table.indices(self._mask | other._mask)
+
         for _ in range(number_of_sons):
             son_size = np.random.randint(min_son_size, max_son_size + 1)
-            combined_tickers = list(set(self.tickers + other.tickers))
-            np.random.shuffle(combined_tickers)
-            son_tickers = combined_tickers[:son_size]
+            son_tickers = np.random.choice(combined_tickers, son_size, replace=False)
 
             son = FundamentalistChromosome(
-                tickers=son_tickers,
-                fundamental_scores=self._fundamental_scores,
+                tickers=None,
+                fundamental_scores=self._table,
+                mask=self._table.mask_from_indices(son_tickers),
             )
             sons.append(son)
 
         return tuple(sons)
 
     def mutate(self) -> None:
-        if not self.tickers:
+        if not self._mask:
             return
 
         mutation_type = np.random.choice(["add", "remove", "swap"])
-        all_tickers = list(self._fundamental_scores.keys())
-        available_tickers = list(set(all_tickers) - set(self.tickers))
+        available_tickers = self._table.full_mask & ~self._mask
 
         if mutation_type == "add":
-            max_new_tickers = len(all_tickers) - len(self.tickers)
-            if max_new_tickers > 0:
-                new_ticker = str(np.random.choice(available_tickers))
-                self.tickers.append(new_ticker)
+            if available_tickers:
+                self._mask |= self._table.random_bit(available_tickers)
 
         elif mutation_type == "remove":
-            if len(self.tickers) > 1:
-                ticker_to_remove = str(np.random.choice(self.tickers))
-                self.tickers.remove(ticker_to_remove)
+            if self._mask.bit_count() > 1:
+                self._mask &= ~self._table.random_bit(self._mask)
 
         elif mutation_type == "swap":
             if available_tickers:
-                ticker_to_remove = str(np.random.choice(self.tickers))
-                ticker_to_add = str(np.random.choice(available_tickers))
-                self.tickers.remove(ticker_to_remove)
-                self.tickers.append(ticker_to_add)
+                ticker_to_remove = self._table.random_bit(self._mask)
+                ticker_to_add = self._table.random_bit(available_tickers)
+                self._mask = (self._mask & ~ticker_to_remove) | ticker_to_add
+
+
+class MaskPopulation(ArrayPopulation):
+    # Ticker selection of every wallet as one (individuals x universe) boolean
+    # matrix; operators follow FundamentalistChromosome's set operations.
+
+    def __init__(
+        self,
+        genomes: np.ndarray,
+        fundamental_scores: "dict[str, FundamentalData] | FundamentalScoreTable",
+    ) -> None:
+        super().__init__(np.asarray(genomes, dtype=bool))
+        self._table = score_table_for(fundamental_scores)
+        self.tickers = self._table.tickers
+        self._scores = self._table.scores
+
+    @classmethod
+    def from_chromosomes(
+        cls, chromosomes: list[FundamentalistChromosome]
+    ) -> "MaskPopulation":
+        table = chromosomes[0]._table
+        genomes = table.masks_to_matrix([chromosome._mask for chromosome in chromosomes])
+
+        return cls(genomes, table)
+
+    def to_chromosomes(self) -> list[FundamentalistChromosome]:
+        return [
+            FundamentalistChromosome(tickers=None, fundamental_scores=self._table, mask=mask)
+            for mask in self._table.matrix_to_masks(self.genomes)
+        ]
+
+    def fitness(self) -> np.ndarray:
+        sizes = np.maximum(self.genomes.sum(axis=1), 1)
+        return (self.genomes @ self._scores) / sizes
+
+    def crossover(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        combined = first | second
+        first_sizes, second_sizes = first.sum(axis=1), second.sum(axis=1)
+        min_son_size = np.minimum(first_sizes, second_sizes)
+        max_son_size = np.maximum(first_sizes, second_sizes)
+
+        sons = []
+        for _ in range(2):
+            son_size = np.random.randint(min_son_size, max_son_size + 1)
+
+            keys = np.random.random(combined.shape)
+            keys[~combined] = np.inf
+            ranks = keys.argsort(axis=1).argsort(axis=1)
+
+            sons.append(ranks < son_size[:, None])
+
+        return np.stack(sons, axis=1)
+
+    def mutate(self, rows: np.ndarray) -> None:
+        wallets = self.genomes[rows]
+        sizes = wallets.sum(axis=1)
+        available = ~wallets
+        has_available = available.any(axis=1)
+        mutation_type = np.random.randint(0, 3, len(rows))
+
+        add = (sizes > 0) & (mutation_type == 0) & has_available
+        remove = (sizes > 1) & (mutation_type == 1)
+        swap = (sizes > 0) & (mutation_type == 2) & has_available
+
+        removing = remove | swap
+        if removing.any():
+            wallets[removing, random_true_column(wallets[removing])] = False
+
+        adding = add | swap
+        if adding.any():
+            wallets[adding, random_true_column(available[adding])] = True
+
+        self.genomes[rows] = wallets
@@ -0,0 +1,336 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+
+from src.genetic_alghoritm.checkpoint import load_checkpoint, save_checkpoint
+from src.genetic_alghoritm.island_model import IslandModelGeneticAlgorithm
+from src.market.fundamentals_cache import FundamentalsCache, fetch_fundamentals
+from src.market.returns_market_engine import ReturnsMarketEngine
+from src.models.stock import FundamentalData
+from src.usecases.fundamentalist import FundamentalistChromosome, FundamentalScoreTable
+from src.usecases.volatility import TripleRiskEfficiencyChromosome
+
+STAGES = ("prices", "fundamentals", "fundamentalist", "risk_efficiency")
+
+
+@dataclass
+class MarketConfig:
+    # source "yahoo" downloads ``tickers`` between ``start`` and ``end``;
+    # "synthetic" builds a SyntheticMarketEngine (``tickers`` may then be a
+    # count) with ``days`` and ``seed``, for offline runs.
+    tickers: Union[list[str], int]
+    source: str = "yahoo"
+    start: str = "2023-01-01"
+    end: str = "2024-01-01"
+    period: str = "1d"
+    risk_free_rate: float = 0.05
+    days: int = 252
+    seed: Optional[int] = None
+    fundamentals_cache: Optional[str] = None
+
+
+@dataclass
+class StageConfig:
+    population_size: int = 50
+    threshold: Optional[float] = None
+    islands: int = 5
+    max_generations: int = 10
+    mutation_chance: float = 0.1
+    crossover_chance: float = 0.7
+    executor: str = "thread"
+    seed: int = 0
+    # fundamentalist stage: wallet size drawn up to ``max_assets``
+    max_assets: int = 7
+    # risk-efficiency stage: shares spread over the best wallet's tickers
+    total_number_of_stocks: int = 100
+
+
+@dataclass
+class PipelineConfig:
+    market: MarketConfig
+    fundamentalist: StageConfig = field(
+        default_factory=lambda: StageConfig(threshold=0.8)
+    )
+    risk_efficiency: StageConfig = field(
+        default_factory=lambda: StageConfig(threshold=1.10)
+    )
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "PipelineConfig":
+        defaults = cls(market=None)
+        return cls(
+            market=MarketConfig(**payload["market"]),
+            fundamentalist=StageConfig(
+                **{**asdict(defaults.fundamentalist), **payload.get("fundamentalist", {})}
+            ),
+            risk_efficiency=StageConfig(
+                **{**asdict(defaults.risk_efficiency), **payload.get("risk_efficiency", {})}
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "PipelineConfig":
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+@dataclass
+class StageRecord:
+    name: str
+    key: str
+    digest: str
+    cached: bool
+    seconds: float
+
+
+@dataclass
+class PipelineResult:
+    tickers: list[str]
+    fundamentals: dict[str, FundamentalData]
+    # [(tickers, fitness)] and [(((ticker, amount), ...), fitness)], best first
+    fundamentalist_elite: list[tuple[list[str], float]]
+    risk_efficiency_elite: list[tuple[tuple[tuple[str, int], ...], float]]
+    stages: list[StageRecord]
+
+    @property
+    def best_wallet(self) -> tuple[tuple[str, int], ...]:
+        return self.risk_efficiency_elite[0][0]
+
+
+def _hash(payload: Any) -> str:
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class StageCache:
+    # One file per stage and key. The key hashes the stage's own parameters
+    # with the digests of its inputs' outputs, so a stage reruns only when
+    # its parameters change or an upstream stage produced different data.
+    # Outputs are stored with save_checkpoint (pickle + zlib, atomic).
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, stage: str, key: str) -> Path:
+        return self.directory / f"{stage}-{key[:20]}.ckpt"
+
+    @staticmethod
+    def key(stage: str, params: Any, upstream: list[str]) -> str:
+        return _hash(dict(stage=stage, params=params, upstream=upstream))
+
+    @staticmethod
+    def digest(path: Path) -> str:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _executor(name: str):
+    return IslandModelGeneticAlgorithm.ExecutorType[name.upper()]
+
+
+def _seed(seed: int) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def load_prices(config: MarketConfig) -> tuple[list[str], np.ndarray]:
+    if config.source == "synthetic":
+        from src.market.synthetic_market_engine import SyntheticMarketEngine
+
+        engine = SyntheticMarketEngine(config.tickers, days=config.days, seed=config.seed)
+    elif config.source == "yahoo":
+        from src.market.yahoo_finance_market_engine import YahooFinanceMarketEngine
+
+        engine = YahooFinanceMarketEngine(
+            config.tickers, config.start, config.end, config.period
+        )
+    else:
+        raise ValueError(f"Fonte de mercado desconhecida: {config.source}")
+
+    return engine.tickers, np.ascontiguousarray(engine.returns, dtype=np.float64)
+
+
+def load_fundamentals(config: MarketConfig, tickers: list[str]) -> dict[str, FundamentalData]:
+    if config.source == "synthetic":
+        from src.market.synthetic_market_engine import SyntheticMarketEngine
+
+        fetch = SyntheticMarketEngine(
+            config.tickers, days=config.days, seed=config.seed
+        ).get_fundamentalist_data
+    else:
+        from src.market.yahoo_finance_market_engine import YahooFinanceMarketEngine
+
+        fetch = YahooFinanceMarketEngine.download_fundamentalist_data
+
+    cache = FundamentalsCache(config.fundamentals_cache) if config.fundamentals_cache else None
+    result = fetch_fundamentals(tickers, fetch, cache=cache)
+    if cache is not None:
+        cache.save()
+
+    for failure in result.failures:
+        logging.getLogger(__name__).warning(
+            "Erro ao obter dados fundamentais para %s: %s", failure.ticker, failure.error
+        )
+    return result.data
+
+
+def run_fundamentalist(
+    config: StageConfig, fundamentals: dict[str, FundamentalData]
+) -> list[tuple[list[str], float]]:
+    _seed(config.seed)
+    tickers = list(fundamentals)
+    if not tickers:
+        raise ValueError("Nenhum dado fundamentalista disponível para o primeiro estágio")
+
+    # Scores are computed once for the whole population.
+    table = FundamentalScoreTable(fundamentals)
+    population = [
+        FundamentalistChromosome(
+            tickers=ReturnsMarketEngine.get_random_assets_wallet(
+                tickers=tickers,
+                min_assets=min(3, len(tickers)),
+                max_assets=min(config.max_assets, len(tickers)),
+            ),
+            fundamental_scores=table,
+        )
+        for _ in range(config.population_size)
+    ]
+
+    result = IslandModelGeneticAlgorithm(
+        initial_population=population,
+        threshold=config.threshold,
+        islands_numbers=config.islands,
+        max_generations=config.max_generations,
+        mutation_chance=config.mutation_chance,
+        crossover_chance=config.crossover_chance,
+        executor_type=_executor(config.executor),
+    ).run()
+
+    elite = {c.tickers: c.fitness() for c in result}
+    return sorted(
+        ((list(t), f) for t, f in elite.items()), key=lambda pair: pair[1], reverse=True
+    )
+
+
+def run_risk_efficiency(
+    config: StageConfig, engine: ReturnsMarketEngine, wallet: list[str]
+) -> list[tuple[tuple[tuple[str, int], ...], float]]:
+    _seed(config.seed)
+
+    population = [
+        TripleRiskEfficiencyChromosome(
+            ReturnsMarketEngine.get_random_distribuited_wallet(
+                wallet=wallet, total_number_of_stocks=config.total_number_of_stocks
+            ),
+            engine,
+            engine.risk_free_rate,
+        )
+        for _ in range(config.population_size)
+    ]
+
+    result = IslandModelGeneticAlgorithm(
+        initial_population=population,
+        threshold=config.threshold,
+        islands_numbers=config.islands,
+        max_generations=config.max_generations,
+        mutation_chance=config.mutation_chance,
+        crossover_chance=config.crossover_chance,
+        executor_type=_executor(config.executor),
+    ).run()
+
+    elite = {c.to_genome(): c.fitness() for c in result}
+    return sorted(elite.items(), key=lambda pair: pair[1], reverse=True)
+
+
+class Pipeline:
+    # prices -> fundamentals -> fundamentalist GA -> risk-efficiency GA, each
+    # stage cached by StageCache. Stages named in ``refresh`` are recomputed
+    # even when cached (e.g. to fetch today's prices); their dependents then
+    # rerun only if the refreshed output differs.
+
+    def __init__(
+        self, config: PipelineConfig, cache_dir: str, refresh: tuple[str, ...] = ()
+    ) -> None:
+        unknown = set(refresh) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Estágios desconhecidos: {sorted(unknown)}")
+
+        self.config = config
+        self.cache = StageCache(cache_dir)
+        self.refresh = set(refresh)
+        self.records: list[StageRecord] = []
+
+    def _stage(
+        self, name: str, params: Any, upstream: list[str], compute: Callable[[], Any]
+    ) -> tuple[Any, str]:
+        started = time.perf_counter()
+        key = self.cache.key(name, params, upstream)
+        path = self.cache.path(name, key)
+
+        cached = path.exists() and name not in self.refresh
+        if cached:
+            value = load_checkpoint(path)
+        else:
+            value = compute()
+            save_checkpoint(path, value)
+
+        digest = self.cache.digest(path)
+        self.records.append(
+            StageRecord(name, key, digest, cached, time.perf_counter() - started)
+        )
+        return value, digest
+
+    def run(self) -> PipelineResult:
+        self.records = []
+        market = self.config.market
+        source = asdict(market)
+        source.pop("risk_free_rate")
+        source.pop("fundamentals_cache")
+
+        (tickers, returns), prices_digest = self._stage(
+            "prices", source, [], lambda: load_prices(market)
+        )
+        # Yahoo fundamentals depend only on the tickers; synthetic ones come
+        # from the same generator as the prices.
+        fundamentals, fundamentals_digest = self._stage(
+            "fundamentals",
+            source if market.source == "synthetic" else dict(source=market.source),
+            [_hash(tickers)],
+            lambda: load_fundamentals(market, tickers),
+        )
+        fundamentalist, fundamentalist_digest = self._stage(
+            "fundamentalist",
+            asdict(self.config.fundamentalist),
+            [fundamentals_digest],
+            lambda: run_fundamentalist(self.config.fundamentalist, fundamentals),
+        )
+
+        engine = ReturnsMarketEngine(
+            tickers, returns, risk_free_rate=market.risk_free_rate, fundamentals=fundamentals
+        )
+        best_wallet = [t for t in fundamentalist[0][0] if t in engine.ticker_index]
+        if len(best_wallet) < 2:
+            raise ValueError("A melhor carteira fundamentalista tem menos de 2 ativos com preços")
+
+        risk_efficiency, _ = self._stage(
+            "risk_efficiency",
+            dict(asdict(self.config.risk_efficiency), risk_free_rate=market.risk_free_rate),
+            [prices_digest, fundamentalist_digest],
+            lambda: run_risk_efficiency(
+                self.config.risk_efficiency, engine, best_wallet
+            ),
+        )
+
+        return PipelineResult(
+            tickers=tickers,
+            fundamentals=fundamentals,
+            fundamentalist_elite=fundamentalist,
+            risk_efficiency_elite=risk_efficiency,
+            stages=list(self.records),
+        )
@@ -0,0 +1,354 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from src.genetic_alghoritm.genetic_algorithm import GeneticAlgorithm
+from src.genetic_alghoritm.island_model import IslandModelGeneticAlgorithm
+from src.genetic_alghoritm.observers import MemoryCollector
+from src.market.returns_market_engine import ReturnsMarketEngine
+from src.market.shared_memory import SharedMarketData
+from src.market.snapshot import EngineSnapshot
+from src.usecases.volatility import TripleRiskEfficiencyChromosome
+
+DEFAULTS = dict(
+    population_size=50,
+    mutation_chance=0.1,
+    crossover_chance=0.7,
+    islands_numbers=1,
+    selection_type="TOURNAMENT",
+    wallet_size=7,
+)
+
+
+def grid(space: dict[str, list]) -> list[dict]:
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def random_search(
+    space: dict[str, Union[list, tuple]], samples: int, seed: int = None
+) -> list[dict]:
+    # Lists are sampled as choices, (low, high) tuples uniformly: integers
+    # with randint, floats with uniform.
+    rng = random.Random(seed)
+
+    def draw(values):
+        if isinstance(values, tuple):
+            low, high = values
+            if isinstance(low, int) and isinstance(high, int):
+                return rng.randint(low, high)
+            return rng.uniform(low, high)
+        return rng.choice(values)
+
+    return [{name: draw(values) for name, values in space.items()} for _ in range(samples)]
+
+
+@dataclass
+class TrialResult:
+    trial: int
+    params: dict
+    rung: int
+    generations: int
+    seconds: float
+    best_fitness: float
+    evaluations: int
+    # (seconds since start, best fitness so far) after every generation
+    curve: list[tuple[float, float]] = field(default_factory=list)
+    abandoned: bool = False
+
+    def row(self) -> dict:
+        return dict(
+            trial=self.trial,
+            **self.params,
+            rung=self.rung,
+            generations=self.generations,
+            seconds=round(self.seconds, 4),
+            best_fitness=round(self.best_fitness, 6),
+            evaluations=self.evaluations,
+            abandoned=self.abandoned,
+        )
+
+
+_engine: Optional[ReturnsMarketEngine] = None
+
+
+def _attach(shared: SharedMarketData) -> None:
+    # Pool initializer: every worker maps the parent's shared block once and
+    # keeps the engine for all the trials it runs.
+    global _engine
+    _engine = shared.attach()
+
+
+def _curve(collector: MemoryCollector) -> list[tuple[float, float]]:
+    curve, best = [], float("-inf")
+    for event in sorted(collector.events, key=lambda event: event.elapsed_seconds):
+        best = max(best, event.best_fitness)
+        curve.append((round(event.elapsed_seconds, 6), best))
+    return curve
+
+
+def run_trial(
+    trial: int,
+    params: dict,
+    rung: int,
+    generations: int,
+    threshold: Optional[float],
+    wallet: Optional[list[str]],
+    engine: ReturnsMarketEngine = None,
+) -> TrialResult:
+    engine = engine or _engine
+    settings = {**DEFAULTS, **params}
+
+    random.seed(settings["seed"])
+    np.random.seed(settings["seed"])
+
+    tickers = wallet or random.sample(
+        engine.tickers, min(settings["wallet_size"], len(engine.tickers))
+    )
+    population = [
+        TripleRiskEfficiencyChromosome(
+            engine.get_random_distribuited_wallet(tickers, total_number_of_stocks=100),
+            engine,
+            engine.risk_free_rate,
+        )
+        for _ in range(settings["population_size"])
+    ]
+
+    collector = MemoryCollector()
+    options = dict(
+        initial_population=population,
+        threshold=threshold,
+        max_generations=generations,
+        mutation_chance=settings["mutation_chance"],
+        crossover_chance=settings["crossover_chance"],
+        selection_type=GeneticAlgorithm.SelectionType[settings["selection_type"]],
+        observers=[collector],
+    )
+
+    # Trials already run in parallel processes, so islands share a thread
+    # pool inside their worker.
+    started = time.perf_counter()
+    if settings["islands_numbers"] > 1:
+        algorithm = IslandModelGeneticAlgorithm(
+            islands_numbers=settings["islands_numbers"],
+            executor_type=IslandModelGeneticAlgorithm.ExecutorType.THREAD,
+            **options,
+        )
+        algorithm.run()
+        stats = algorithm.island_stats
+    else:
+        algorithm = GeneticAlgorithm(**options)
+        algorithm.run()
+        stats = [algorithm.stats()]
+    seconds = time.perf_counter() - started
+
+    return TrialResult(
+        trial=trial,
+        params=params,
+        rung=rung,
+        generations=max(island["generation"] for island in stats),
+        seconds=seconds,
+        best_fitness=max(island["best_fitness"] for island in stats),
+        evaluations=sum(island["evaluations"] for island in stats),
+        curve=_curve(collector),
+    )
+
+
+class Sweep:
+    # Runs GA configurations of the risk-efficiency stage in a process pool.
+    # The market returns are published once in shared memory (or, for an
+    # engine attached from an EngineSnapshot, memory-mapped from its file)
+    # and every worker attaches to that block, so N workers cost one copy of
+    # the data.
+    # Every configuration gets ``seed + trial`` unless it sets its own seed.
+    # Without an explicit ``wallet``, all of them optimize the same assets:
+    # the universe is shuffled once with ``seed`` and each trial takes its
+    # first ``wallet_size`` tickers, so fitness differences come from the
+    # hyperparameters rather than from the asset draw.
+
+    def __init__(
+        self,
+        engine: ReturnsMarketEngine,
+        wallet: Optional[list[str]] = None,
+        generations: int = 20,
+        threshold: Optional[float] = None,
+        max_workers: Optional[int] = None,
+        seed: int = 0,
+        start_method: Optional[str] = None,
+    ) -> None:
+        self.engine = engine
+        self.wallet = wallet
+        self.generations = generations
+        self.threshold = threshold
+        self.max_workers = max_workers
+        self.seed = seed
+        self.start_method = start_method
+        self._universe = random.Random(seed).sample(engine.tickers, len(engine.tickers))
+
+    def _trials(self, configurations: list[dict]) -> list[tuple[int, dict]]:
+        return [
+            (trial, {"seed": self.seed + trial, **params})
+            for trial, params in enumerate(configurations)
+        ]
+
+    def _wallet(self, params: dict) -> list[str]:
+        if self.wallet:
+            return self.wallet
+        return self._universe[: {**DEFAULTS, **params}["wallet_size"]]
+
+    def _run_rung(self, pool, trials, rung: int, generations: int) -> list[TrialResult]:
+        futures = [
+            pool.submit(
+                run_trial,
+                trial,
+                params,
+                rung,
+                generations,
+                self.threshold,
+                self._wallet(params),
+            )
+            for trial, params in trials
+        ]
+        return [future.result() for future in futures]
+
+    def _pool(self, shared: SharedMarketData) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_attach,
+            initargs=(shared,),
+        )
+
+    def run(self, configurations: list[dict]) -> list[TrialResult]:
+        shared = TripleRiskEfficiencyChromosome.share_context(self.engine)
+        try:
+            with self._pool(shared) as pool:
+                return self._run_rung(pool, self._trials(configurations), 0, self.generations)
+        finally:
+            TripleRiskEfficiencyChromosome.release_context(shared)
+
+    def successive_halving(
+        self, configurations: list[dict], min_generations: int = 5, eta: int = 3
+    ) -> list[TrialResult]:
+        # Rung r runs the surviving configurations for min_generations * eta^r
+        # generations (capped at self.generations) and keeps the best 1/eta by
+        # best fitness. Survivors restart with their seed and the larger
+        # budget. Returns the last result of every configuration, with
+        # ``abandoned`` set on those dropped before the final rung.
+        trials = self._trials(configurations)
+        latest: dict[int, TrialResult] = {}
+
+        shared = TripleRiskEfficiencyChromosome.share_context(self.engine)
+        try:
+            with self._pool(shared) as pool:
+                rung, generations = 0, min(min_generations, self.generations)
+                while True:
+                    results = self._run_rung(pool, trials, rung, generations)
+                    latest.update((result.trial, result) for result in results)
+
+                    if generations >= self.generations or len(trials) <= 1:
+                        break
+
+                    keep = max(1, math.ceil(len(trials) / eta))
+                    ranked = sorted(results, key=lambda result: -result.best_fitness)
+                    survivors = {result.trial for result in ranked[:keep]}
+                    for result in ranked[keep:]:
+                        result.abandoned = True
+
+                    trials = [(trial, params) for trial, params in trials if trial in survivors]
+                    rung, generations = rung + 1, min(generations * eta, self.generations)
+        finally:
+            TripleRiskEfficiencyChromosome.release_context(shared)
+
+        return sorted(latest.values(), key=lambda result: -result.best_fitness)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Hyperparameter sweep of the risk-efficiency GA over a synthetic market."
+    )
+    parser.add_argument("--space", required=True, help="JSON file: parameter -> values")
+    parser.add_argument("--samples", type=int, help="random search instead of the full grid")
+    parser.add_argument("--halving", action="store_true", help="successive halving")
+    parser.add_argument("--min-generations", type=int, default=5)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--universe", type=int, default=16)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--start-method", choices=["fork", "spawn", "forkserver"])
+    parser.add_argument(
+        "--snapshot", help="engine snapshot directory, built on first use and reused after"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the results, with curves, to this file")
+    args = parser.parse_args(argv)
+
+    from src.market.synthetic_market_engine import SyntheticMarketEngine
+
+    # The space file maps each parameter to a list of values or to
+    # {"low": ..., "high": ...} for random search.
+    with open(args.space) as file:
+        space = {
+            name: (values["low"], values["high"]) if isinstance(values, dict) else values
+            for name, values in json.load(file).items()
+        }
+
+    configurations = (
+        random_search(space, args.samples, args.seed) if args.samples else grid(space)
+    )
+    source = dict(universe=args.universe, days=args.days, seed=args.seed)
+    if args.snapshot and Path(args.snapshot, EngineSnapshot.META).exists():
+        snapshot = EngineSnapshot(args.snapshot)
+        if snapshot.source != source:
+            raise ValueError(
+                f"O snapshot em {args.snapshot} foi gerado com {snapshot.source}, "
+                f"diferente de {source}; apague o diretório ou use outro"
+            )
+        engine = snapshot.attach()
+    else:
+        engine = SyntheticMarketEngine(
+            args.universe, days=args.days, risk_free_rate=0.05, seed=args.seed
+        )
+        if args.snapshot:
+            engine = EngineSnapshot.save(engine, args.snapshot, source).attach()
+
+    sweep = Sweep(
+        engine,
+        generations=args.generations,
+        threshold=args.threshold,
+        max_workers=args.workers,
+        seed=args.seed,
+        start_method=args.start_method,
+    )
+
+    if args.halving:
+        results = sweep.successive_halving(configurations, args.min_generations, args.eta)
+    else:
+        results = sweep.run(configurations)
+
+    rows = [result.row() for result in results]
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump([asdict(result) for result in results], file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
+import numpy as np
+
 from src.models.stock import Stock
 from src.market.base import IMarketEngine
+from src.market.shared_memory import SharedMarketData
+from src.genetic_alghoritm.array_population import ArrayPopulation, random_true_column
 from src.genetic_alghoritm.chromosome import Chromosome
 
 from random import choice, choices, randint
 
 
+def _combine_ratios(sharpe, sortino, calmar):
+    sharpe_norm = sharpe / 3
+    sortino_norm = sortino / 4
+    calmar_norm = calmar / 5
+
+    return 0.4 * sharpe_norm + 0.3 * sortino_norm + 0.3 * calmar_norm
+
+
 class TripleRiskEfficiencyChromosome(Chromosome):
 
     def __init__(
@@ -22,17 +34,72 @@ class TripleRiskEfficiencyChromosome(Chromosome):
         return hash(tuple((s.ticker, s.amount) for s in self._stocks))
 
     def fitness(self):
-        sharpe = self._market_engine.get_sharpe_ratio(tuple(self._stocks))
-        sortino = self._market_engine.get_sortino_ratio(tuple(self._stocks))
-        calmar = self._market_engine.get_calmar_ratio(tuple(self._stocks))
+        sharpe, sortino, calmar = self._market_engine.get_portfolio_metrics(
+            self._stocks
+        )
+
+        return _combine_ratios(sharpe, sortino, calmar)
+
+    @classmethod
+    def batch_fitness(
+        cls, population: list[TripleRiskEfficiencyChromosome]
+    ) -> list[float]:
+        market_engine = population[0]._market_engine
+        sharpe, sortino, calmar = market_engine.get_population_metrics(
+            [individual._stocks for individual in population]
+        )
+
+        return _combine_ratios(sharpe, sortino, calmar).tolist()
+
+    def objectives(self) -> tuple[float, float, float]:
+        return self._market_engine.get_portfolio_metrics(self._stocks)
+
+    @classmethod
+    def batch_objectives(
+        cls, population: list[TripleRiskEfficiencyChromosome]
+    ) -> list[tuple[float, float, float]]:
+        market_engine = population[0]._market_engine
+        sharpe, sortino, calmar = market_engine.get_population_metrics(
+            [individual._stocks for individual in population]
+        )
 
-        sharpe_norm = sharpe / 3
-        sortino_norm = sortino / 4
-        calmar_norm = calmar / 5
+        return list(zip(sharpe.tolist(), sortino.tolist(), calmar.tolist()))
 
-        score = 0.4 * sharpe_norm + 0.3 * sortino_norm + 0.3 * calmar_norm
+    def to_genome(self) -> tuple[tuple[str, int], ...]:
+        return tuple((s.ticker, s.amount) for s in self._stocks)
 
-        return score
+    def genome_context(self) -> IMarketEngine:
+        return self._market_engine
+
+    def fitness_scope(self) -> tuple[IMarketEngine, int]:
+        return self._market_engine, self._market_engine.revision
+
+    @classmethod
+    def from_genome(
+        cls, genome: tuple[tuple[str, int], ...], context: IMarketEngine
+    ) -> TripleRiskEfficiencyChromosome:
+        return cls(
+            [Stock(ticker, amount) for ticker, amount in genome],
+            context,
+            context.risk_free_rate,
+        )
+
+    @classmethod
+    def share_context(cls, context: IMarketEngine) -> SharedMarketData:
+        # An engine attached from an EngineSnapshot is shared as the snapshot
+        # itself: workers memory-map the same file instead of a new copy.
+        snapshot = getattr(context, "snapshot", None)
+        if snapshot is not None:
+            return snapshot
+        return SharedMarketData.from_engine(context)
+
+    @classmethod
+    def attach_context(cls, shared_context: SharedMarketData) -> IMarketEngine:
+        return shared_context.attach()
+
+    @classmethod
+    def release_context(cls, shared_context: SharedMarketData) -> None:
+        shared_context.release()
 
     def _create_son_wallet_from_cuts(
         self,
@@ -55,7 +122,7 @@ class TripleRiskEfficiencyChromosome(Chromosome):
                     )
                 )
 
-        return TripleRiskEfficiencyChromosome(
+        return type(self)(
             stocks_for_son,
             self._market_engine,
             self._market_engine.risk_free_rate,
@@ -105,7 +172,7 @@ class TripleRiskEfficiencyChromosome(Chromosome):
 
         return tuple(sons)
 
-    def mutate(self):
+    def _draw_transfer(self) -> tuple[Stock, Stock, int]:
         stock_to_increase, stock_to_decrease = choices(self._stocks, k=2)
         while stock_to_increase is stock_to_decrease or stock_to_decrease.amount < 2:
             stock_to_increase, stock_to_decrease = choices(self._stocks, k=2)
@@ -113,8 +180,268 @@ class TripleRiskEfficiencyChromosome(Chromosome):
         max_transfer = stock_to_decrease.amount // 2
         value_to_transfer = randint(1, max_transfer)
 
+        return stock_to_increase, stock_to_decrease, value_to_transfer
+
+    def mutate(self):
+        stock_to_increase, stock_to_decrease, value_to_transfer = self._draw_transfer()
+
         stock_to_increase.amount += value_to_transfer
         stock_to_decrease.amount -= value_to_transfer
 
     def __str__(self) -> str:
         return f"Wallet: {self._stocks} | Efficiency: {self.fitness()}"
+
+
+class IncrementalTripleRiskEfficiencyChromosome(TripleRiskEfficiencyChromosome):
+    # Keeps the wallet's amount-weighted return series S = R[:, wallet] @ amounts
+    # (portfolio returns are S / total shares). Transfer mutations and
+    # crossover sons record their share changes against the series of the
+    # individual they came from, and on evaluation S is rebuilt as that series
+    # plus R[:, changed] @ changes: O(T) per changed ticker instead of a
+    # gather over the whole wallet, and nothing at all for individuals the
+    # fitness cache already knows. After REFRESH_EVERY derivations the series
+    # is recomputed from scratch, bounding floating-point drift, and so is a
+    # series built before the engine's returns changed (its revision moved,
+    # e.g. a streaming bar), since it belongs to another window.
+    # Requires a ReturnsMarketEngine.
+    REFRESH_EVERY = 32
+
+    def __init__(
+        self,
+        stocks: list[Stock],
+        market_engine: IMarketEngine,
+        free_risk_tax: float,
+    ) -> None:
+        super().__init__(stocks, market_engine, free_risk_tax)
+        # (series, pending share changes per ticker, derivations since refresh,
+        # engine revision the series was computed at)
+        self._base: tuple[np.ndarray, dict[str, int], int, int] = None
+
+    def _needs_refresh(self) -> bool:
+        return (
+            self._base is None
+            or self._base[2] >= self.REFRESH_EVERY
+            or self._base[3] != self._market_engine.revision
+        )
+
+    def _portfolio_returns(self) -> np.ndarray:
+        return self._population_returns([self])[:, 0]
+
+    def _derive(
+        self, source: IncrementalTripleRiskEfficiencyChromosome, changes: dict[str, int]
+    ) -> None:
+        if source._base is None:
+            self._base = None
+            return
+
+        series, pending, updates, revision = source._base
+        merged = dict(pending)
+        for ticker, change in changes.items():
+            merged[ticker] = merged.get(ticker, 0) + change
+
+        self._base = (
+            series,
+            {ticker: change for ticker, change in merged.items() if change},
+            updates + 1,
+            revision,
+        )
+
+    def fitness(self):
+        return float(_combine_ratios(*self.objectives()))
+
+    def objectives(self) -> tuple[float, float, float]:
+        sharpe, sortino, calmar = self._market_engine.get_returns_metrics(
+            self._portfolio_returns()
+        )
+        return float(sharpe), float(sortino), float(calmar)
+
+    @classmethod
+    def _population_returns(cls, population) -> np.ndarray:
+        # Wallets due for a refresh are gathered in full; the others start
+        # from their base series and only the changed tickers are gathered.
+        market_engine = population[0]._market_engine
+        series = np.empty((len(population), len(market_engine.returns)))
+
+        fresh = [i for i, individual in enumerate(population) if individual._needs_refresh()]
+        derived = [i for i, individual in enumerate(population) if not individual._needs_refresh()]
+
+        if fresh:
+            series[fresh] = market_engine.get_sparse_returns(
+                *market_engine.to_sparse_wallets(
+                    [population[i]._stocks for i in fresh], normalize=False
+                )
+            ).T
+
+        changed = []
+        for i in derived:
+            base, changes, _, _ = population[i]._base
+            series[i] = base
+            if changes:
+                changed.append(i)
+
+        if changed:
+            series[changed] += market_engine.get_sparse_returns(
+                *market_engine.to_sparse_wallets(
+                    [
+                        [Stock(t, c) for t, c in population[i]._base[1].items()]
+                        for i in changed
+                    ],
+                    normalize=False,
+                )
+            ).T
+
+        revision = market_engine.revision
+        for i in fresh:
+            population[i]._base = (series[i].copy(), {}, 0, revision)
+        for i in derived:
+            population[i]._base = (
+                series[i].copy(), {}, population[i]._base[2], revision
+            )
+
+        totals = np.array([sum(s.amount for s in ind._stocks) for ind in population])
+        return (series / totals[:, None]).T
+
+    @classmethod
+    def _population_metrics(cls, population):
+        return population[0]._market_engine.get_returns_metrics(
+            cls._population_returns(population)
+        )
+
+    @classmethod
+    def batch_fitness(cls, population) -> list[float]:
+        return _combine_ratios(*cls._population_metrics(population)).tolist()
+
+    @classmethod
+    def batch_objectives(cls, population) -> list[tuple[float, float, float]]:
+        sharpe, sortino, calmar = cls._population_metrics(population)
+        return list(zip(sharpe.tolist(), sortino.tolist(), calmar.tolist()))
+
+    def crossover(self, other):
+        sons = super().crossover(other)
+
+        for son in sons:
+            son_amounts = {s.ticker: s.amount for s in son._stocks}
+            candidates = [
+                (
+                    parent,
+                    {
+                        s.ticker: son_amounts[s.ticker] - s.amount
+                        for s in parent._stocks
+                        if son_amounts[s.ticker] != s.amount
+                    },
+                )
+                for parent in (self, other)
+                if parent._base is not None
+            ]
+
+            if candidates:
+                parent, changes = min(candidates, key=lambda c: len(c[1]))
+                if len(changes) <= len(son._stocks) // 2:
+                    son._derive(parent, changes)
+
+        return sons
+
+    def mutate(self):
+        stock_to_increase, stock_to_decrease, value_to_transfer = self._draw_transfer()
+
+        stock_to_increase.amount += value_to_transfer
+        stock_to_decrease.amount -= value_to_transfer
+
+        self._derive(
+            self,
+            {
+                stock_to_increase.ticker: value_to_transfer,
+                stock_to_decrease.ticker: -value_to_transfer,
+            },
+        )
+
+
+class AllocationPopulation(ArrayPopulation):
+    # Share amounts of every wallet as one (individuals x universe) integer
+    # matrix; operators follow TripleRiskEfficiencyChromosome row by row.
+    MAX_TRIES_FOR_GENETIC_DIVERSITY = 10
+
+    def __init__(self, genomes: np.ndarray, market_engine: IMarketEngine) -> None:
+        super().__init__(np.asarray(genomes, dtype=np.int64))
+        self._market_engine = market_engine
+
+    @classmethod
+    def from_chromosomes(
+        cls, chromosomes: list[TripleRiskEfficiencyChromosome]
+    ) -> AllocationPopulation:
+        market_engine = chromosomes[0]._market_engine
+        genomes = np.zeros((len(chromosomes), len(market_engine.tickers)), np.int64)
+        for row, chromosome in enumerate(chromosomes):
+            for stock in chromosome._stocks:
+                genomes[row, market_engine.ticker_index[stock.ticker]] += stock.amount
+
+        return cls(genomes, market_engine)
+
+    def to_chromosomes(self) -> list[TripleRiskEfficiencyChromosome]:
+        tickers = self._market_engine.tickers
+        return [
+            TripleRiskEfficiencyChromosome(
+                [Stock(tickers[j], int(row[j])) for j in np.flatnonzero(row)],
+                self._market_engine,
+                self._market_engine.risk_free_rate,
+            )
+            for row in self.genomes
+        ]
+
+    def fitness(self) -> np.ndarray:
+        weights = self.genomes / self.genomes.sum(axis=1, keepdims=True)
+        return _combine_ratios(*self._market_engine.get_weights_metrics(weights))
+
+    @staticmethod
+    def _draw_sons(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        from_second = (first != second) & (first > 0)
+        from_second &= np.random.random(first.shape) < 0.5
+        return np.where(from_second, second, first)
+
+    def crossover(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        sons = np.stack(
+            [self._draw_sons(first, second), self._draw_sons(first, second)], axis=1
+        )
+
+        for son in range(2):
+            for tries in range(self.MAX_TRIES_FOR_GENETIC_DIVERSITY + 1):
+                clash = (sons[:, son] == first).all(axis=1) | (
+                    sons[:, son] == second
+                ).all(axis=1)
+                if son == 1:
+                    clash |= (sons[:, 1] == sons[:, 0]).all(axis=1)
+
+                if not clash.any():
+                    break
+
+                if tries == self.MAX_TRIES_FOR_GENETIC_DIVERSITY:
+                    self._transfer(sons[:, son], np.flatnonzero(clash))
+                else:
+                    sons[clash, son] = self._draw_sons(first[clash], second[clash])
+
+        return sons
+
+    @staticmethod
+    def _transfer(genomes: np.ndarray, rows: np.ndarray) -> None:
+        wallets = genomes[rows]
+        held = wallets > 0
+        donors = wallets >= 2
+
+        valid = donors.any(axis=1) & (held.sum(axis=1) >= 2)
+        rows, wallets, held, donors = rows[valid], wallets[valid], held[valid], donors[valid]
+        if not len(rows):
+            return
+
+        positions = np.arange(len(rows))
+        stock_to_decrease = random_true_column(donors)
+        held[positions, stock_to_decrease] = False
+        stock_to_increase = random_true_column(held)
+
+        max_transfer = wallets[positions, stock_to_decrease] // 2
+        value_to_transfer = np.random.randint(1, max_transfer + 1)
+
+        genomes[rows, stock_to_increase] += value_to_transfer
+        genomes[rows, stock_to_decrease] -= value_to_transfer
+
+    def mutate(self, rows: np.ndarray) -> None:
+        self._transfer(self.genomes, rows)
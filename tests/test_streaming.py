@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+
+from src.genetic_alghoritm.genetic_algorithm import GeneticAlgorithm
+from src.market.streaming import Bar, StreamingMarketEngine
+from src.market.synthetic_market_engine import SyntheticMarketEngine
+from src.usecases.volatility import (
+    IncrementalTripleRiskEfficiencyChromosome,
+    TripleRiskEfficiencyChromosome,
+)
+
+
+def _reference_fitnesses(population, engine):
+    return [
+        TripleRiskEfficiencyChromosome.from_genome(individual.to_genome(), engine).fitness()
+        for individual in population
+    ]
+
+
+def test_rescore_matches_fresh_evaluation_while_filling_and_sliding():
+    random.seed(0)
+    np.random.seed(0)
+
+    market = SyntheticMarketEngine(12, days=120, seed=1, risk_free_rate=0.05)
+    history, live = market.prices[:61], market.prices[60:]
+    # 60 returns in a buffer of 70: the first bars grow the window, the
+    # following ones slide it.
+    engine = StreamingMarketEngine.from_prices(
+        market.tickers, history, capacity=70, risk_free_rate=0.05
+    )
+
+    tickers = random.sample(market.tickers, 6)
+    population = [
+        IncrementalTripleRiskEfficiencyChromosome(
+            engine.get_random_distribuited_wallet(tickers, total_number_of_stocks=100),
+            engine,
+            0.05,
+        )
+        for _ in range(30)
+    ]
+    algorithm = GeneticAlgorithm(
+        population, threshold=None, max_generations=10**6, mutation_chance=0.5, observers=[]
+    )
+    algorithm.evolve(3)
+
+    start = np.datetime64("2024-01-02T10:00")
+    for minute, prices in enumerate(live[1:21]):
+        engine.append(Bar(start + np.timedelta64(minute, "m"), dict(zip(market.tickers, prices))))
+        algorithm.rescore()
+
+        np.testing.assert_allclose(
+            algorithm._fitnesses,
+            _reference_fitnesses(algorithm._population, engine),
+            rtol=1e-9,
+            atol=1e-12,
+        )
+        best, best_fitness = algorithm.best
+        assert abs(_reference_fitnesses([best], engine)[0] - best_fitness) < 1e-9
+
+        algorithm.evolve(1)
+
+    assert len(engine.returns) == engine.capacity
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from src.market import yahoo_finance_market_engine
+from src.market.returns_market_engine import ReturnsMarketEngine
+from src.market.yahoo_finance_market_engine import YahooFinanceMarketEngine
+from src.models.stock import Stock
+
+
+def _history(adj_close: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat({"Adj Close": adj_close}, axis=1)
+
+
+def test_late_listed_and_missing_tickers_do_not_shorten_other_wallets(monkeypatch):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2023-01-02", periods=200)
+    prices = pd.DataFrame(
+        100 * np.cumprod(1 + rng.normal(0.0005, 0.01, (200, 3)), axis=0),
+        index=dates,
+        columns=["AAA", "BBB", "LATE"],
+    )
+    prices.loc[dates[:50], "LATE"] = np.nan
+    prices["GONE"] = np.nan
+
+    monkeypatch.setattr(
+        yahoo_finance_market_engine,
+        "download_history",
+        lambda stocks, start, end, period: _history(prices),
+    )
+    engine = YahooFinanceMarketEngine(list(prices.columns), "2023-01-01", "2024-01-01")
+
+    assert engine.tickers == ["AAA", "BBB", "LATE"]
+    assert engine.returns.shape == (199, 3)
+    assert not np.isnan(engine.returns).any()
+
+    wallet = [Stock("AAA", 60), Stock("BBB", 40)]
+    reference = ReturnsMarketEngine(
+        ["AAA", "BBB"], prices[["AAA", "BBB"]].pct_change().dropna().to_numpy()
+    )
+    np.testing.assert_allclose(
+        engine.get_portfolio_metrics(wallet), reference.get_portfolio_metrics(wallet)
+    )
+
+    late_wallet = [Stock("AAA", 50), Stock("LATE", 50)]
+    assert np.isfinite(engine.get_portfolio_metrics(late_wallet)).all()